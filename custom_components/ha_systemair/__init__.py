@@ -4,24 +4,24 @@ import logging
 
 import voluptuous as vol
 
-from .const import (
-    DOMAIN,
-    SIGNAL_SYSTEMAIR_UPDATE_RECEIVED,
-)
+from .const import DATA_HUB, DOMAIN
+from .coordinator import STORAGE_VERSION, SystemAIRCoordinator
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.storage import Store
 
-from .systemair.save.api import SaveAPI
+from .systemair.save.hub import SaveHub
+from .systemair.save.const import SYNC_MODE_PUSH
 
 _LOGGER = logging.getLogger(__name__)
 CONFIG_SCHEMA = vol.Schema({DOMAIN: vol.Schema({})}, extra=vol.ALLOW_EXTRA)
-PLATFORMS = ["climate"]
+PLATFORMS = ["climate", "sensor", "binary_sensor"]
 
 
 async def async_setup(hass: HomeAssistant, config: dict):
     """Set up the savecair component."""
     hass.data[DOMAIN] = {}
+    hass.data[DATA_HUB] = SaveHub()
 
     return True
 
@@ -29,31 +29,22 @@ async def async_setup(hass: HomeAssistant, config: dict):
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Set up savecair from a config entry."""
 
-    async def on_error(err):
-        _LOGGER.error(err)
-
-    async def on_update(data):
-        async_dispatcher_send(hass, SIGNAL_SYSTEMAIR_UPDATE_RECEIVED, data)
-
-    sa = SaveAPI(
-        iam_id=entry.data["iam_id"], password=entry.data["password"], load_all=True
+    sa = hass.data[DATA_HUB].add_unit(
+        entry.data["iam_id"],
+        entry.data["password"],
+        sync_mode=SYNC_MODE_PUSH,
     )
-    sa.add_listener_on_error(on_error)
-    sa.add_listener_on_update(on_update)
-
-    await sa.connect()
-    state = await sa.login()
-
-    if "machineID" not in state:
-        return False
 
-    hass.data[DOMAIN][entry.entry_id] = sa
+    coordinator = SystemAIRCoordinator(hass, sa, _store(hass, entry))
+    await coordinator.async_restore()
+    hass.data[DOMAIN][entry.entry_id] = coordinator
 
     for component in PLATFORMS:
         hass.async_create_task(
             hass.config_entries.async_forward_entry_setup(entry, component)
         )
 
+    coordinator.async_start(entry)
     return True
 
 
@@ -68,6 +59,17 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
         )
     )
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        await coordinator.async_stop()
+        await hass.data[DATA_HUB].remove_unit(entry.data["iam_id"])
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Remove the state snapshot of a deleted config entry."""
+    await _store(hass, entry).async_remove()
+
+
+def _store(hass, entry):
+    return Store(hass, STORAGE_VERSION, "%s.%s" % (DOMAIN, entry.entry_id))
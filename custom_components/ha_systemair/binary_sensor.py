@@ -0,0 +1,59 @@
+"""Binary sensors of the savecair integration: alarms and active functions."""
+from homeassistant.components.binary_sensor import (
+    DEVICE_CLASS_PROBLEM,
+    DEVICE_CLASS_RUNNING,
+    BinarySensorEntity,
+)
+from homeassistant.config_entries import ConfigEntry
+
+from .const import DOMAIN
+from .entity import SystemAIREntity
+from .systemair.save.const import (
+    SENSOR_ALARM_CHANGE_FILTER,
+    SENSOR_ALARM_EXTRACT_RPM,
+    SENSOR_ALARM_FROST_PROTECTION,
+    SENSOR_ALARM_SUPPLY_RPM,
+)
+from .systemair.save.registry import GROUP_ALARM, GROUP_FUNCTION, sensors_in
+
+# group -> device class
+GROUP_DEVICE_CLASS = {
+    GROUP_ALARM: DEVICE_CLASS_PROBLEM,
+    GROUP_FUNCTION: DEVICE_CLASS_RUNNING,
+}
+
+# Every other alarm and all function flags start disabled, so a default install does not read them
+ENABLED_BY_DEFAULT = frozenset((
+    SENSOR_ALARM_CHANGE_FILTER,
+    SENSOR_ALARM_FROST_PROTECTION,
+    SENSOR_ALARM_SUPPLY_RPM,
+    SENSOR_ALARM_EXTRACT_RPM,
+))
+
+
+async def async_setup_entry(hass, config_entry: ConfigEntry, async_add_entities):
+    """Set up the alarm and function binary sensors of a unit."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    async_add_entities([
+        SystemAIRBinarySensor(coordinator, key, device_class)
+        for group, device_class in GROUP_DEVICE_CLASS.items()
+        for key in sensors_in(group)
+    ])
+
+
+class SystemAIRBinarySensor(SystemAIREntity, BinarySensorEntity):
+    """An alarm or function flag of the unit. Written only when the flag changes."""
+
+    def __init__(self, coordinator, key, device_class):
+        super().__init__(coordinator, key, enabled_default=key in ENABLED_BY_DEFAULT)
+        self._device_class = device_class
+
+    @property
+    def device_class(self):
+        return self._device_class
+
+    @property
+    def is_on(self):
+        value = self._sab.state.get(self._key)
+        return bool(value) if value is not None else None
@@ -1,4 +1,5 @@
 """Support for the SystemAIR HVAC."""
+import asyncio
 import logging
 
 from .const import (
@@ -10,7 +11,6 @@ from .const import (
     PRESET_IDLE,
     PRESET_MANUAL,
     PRESET_REFRESH,
-    SIGNAL_SYSTEMAIR_UPDATE_RECEIVED,
 )
 
 from homeassistant.components.climate import ClimateEntity
@@ -32,18 +32,9 @@ from homeassistant.components.climate.const import (
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import ATTR_TEMPERATURE, TEMP_CELSIUS
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
 
 from .const import DOMAIN
 from .systemair.save.const import (
-    SENSOR_MODE_CHANGE_REQUEST,
-    SENSOR_CURRENT_FAN_MODE,
-    SENSOR_TARGET_TEMPERATURE,
-    SENSOR_CUSTOM_OPERATION,
-    SENSOR_TEMPERATURE_EXTRACT,
-    SENSOR_CURRENT_OPERATION,
-    SENSOR_CUSTOM_FAN_MODE,
-    SENSOR_CURRENT_HUMIDITY,
     SA_OPERATION_MODE_AUTO,
     SA_OPERATION_MODE_MANUAL,
     SA_OPERATION_MODE_CROWDED,
@@ -53,8 +44,11 @@ from .systemair.save.const import (
     SA_OPERATION_MODE_IDLE,
     SA_OPERATION_MODE_OFF
 )
+from .systemair.save.log import RateLimitedLog
+from .systemair.save.registry import CLIMATE_ATTRIBUTES, CLIMATE_SETTERS, SENSORS
 
 _LOGGER = logging.getLogger(__name__)
+_LOG_LIMITED = RateLimitedLog(_LOGGER)
 
 HA_STATE_TO_SA = {
     HVAC_MODE_AUTO: SA_OPERATION_MODE_AUTO,
@@ -73,37 +67,28 @@ HA_PRESET_TO_SA = {
 
 FAN_MAXIMUM = "maximum"
 
-HA_SET_ATTR_TO_SA = {
-    ATTR_HVAC_MODE: SENSOR_CUSTOM_OPERATION,
-    ATTR_TEMPERATURE: SENSOR_TARGET_TEMPERATURE,
-    ATTR_FAN_MODE: SENSOR_CURRENT_FAN_MODE,
-    ATTR_PRESET_MODE: SENSOR_MODE_CHANGE_REQUEST,
-}
+# The registry names climate attributes as Home Assistant does, so its tables are keyed by the ATTR_* constants
+HA_SET_ATTR_TO_SA = CLIMATE_SETTERS
+HA_ATTR_TO_SA = CLIMATE_ATTRIBUTES
 
-HA_ATTR_TO_SA = {
-    ATTR_TEMPERATURE: SENSOR_TEMPERATURE_EXTRACT,
-    ATTR_TARGET_TEMPERATURE: SENSOR_TARGET_TEMPERATURE,
-    ATTR_PRESET_MODE: SENSOR_CURRENT_OPERATION,
-    ATTR_FAN_MODE: SENSOR_CUSTOM_FAN_MODE,
-    ATTR_HVAC_MODE: SENSOR_CUSTOM_OPERATION,
-    ATTR_CURRENT_HUMIDITY: SENSOR_CURRENT_HUMIDITY,
-}
+_SA_KEYS = frozenset(k for k in HA_ATTR_TO_SA.values() if k in SENSORS)
 
 
 async def async_setup_entry(hass, config_entry: ConfigEntry, async_add_entities):
     """Set up Systemair climate based on config_entry."""
-    api = hass.data[DOMAIN][config_entry.entry_id]
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
 
-    async_add_entities([SystemAIRClimate(hass, api)])
+    async_add_entities([SystemAIRClimate(coordinator)])
 
 
 class SystemAIRClimate(ClimateEntity):
     """Representation of a SystemAIR HVAC."""
 
-    def __init__(self, hass, sab):
+    def __init__(self, coordinator):
         """Initialize the climate device."""
         self._name = DOMAIN
-        self._sab = sab
+        self._coordinator = coordinator
+        self._sab = coordinator.api
         self._list = {
             ATTR_HVAC_MODE: list(HA_STATE_TO_SA),
             ATTR_FAN_MODE: [FAN_OFF, FAN_LOW, FAN_MEDIUM, FAN_HIGH, FAN_MAXIMUM],
@@ -113,33 +98,48 @@ class SystemAIRClimate(ClimateEntity):
         self._supported_features |= SUPPORT_PRESET_MODE
         self._supported_features |= SUPPORT_FAN_MODE
 
-        async def _handle_update(var):
-            self.async_schedule_update_ha_state()
-
-        # Register for dispatcher updates
-        async_dispatcher_connect(hass, SIGNAL_SYSTEMAIR_UPDATE_RECEIVED, _handle_update)
+    async def async_added_to_hass(self):
+        """Subscribe to changes of the keys this entity shows."""
+        self.async_on_remove(
+            self._coordinator.async_add_listener(self.async_write_ha_state, _SA_KEYS)
+        )
 
     def get(self, key):
         """Retrieve device settings from API library cache."""
         sa_key = HA_ATTR_TO_SA.get(key)
-        if sa_key not in self._sab.state:
-            _LOGGER.warning("Missing attribute %s", sa_key)
-            return None
-
-        sa_value = self._sab.state[sa_key]
-        _LOGGER.debug("sa_key=%s, key=%s, value=%s", sa_key, key, sa_value)
+        sa_value = self._sab.state.get(sa_key)
+        if sa_value is None and sa_key not in self._sab.state:
+            _LOG_LIMITED.warning(sa_key, "Missing attribute %s", sa_key)
         return sa_value
 
     async def _set(self, settings):
-        """Set device settings using API."""
+        """Set device settings using API. All settings are sent in a single WRITE frame."""
+        writes = []
         for ha_key in HA_SET_ATTR_TO_SA:
             value = settings.get(ha_key)
             if value is None:
                 continue
 
-            sa_key = HA_SET_ATTR_TO_SA.get(ha_key)
+            sa_key = HA_SET_ATTR_TO_SA[ha_key]
             _LOGGER.debug("sa_key=%s, ha_key=%s, value=%s", sa_key, ha_key, value)
-            await self._sab.set(sa_key, value)
+            writes.append(self._sab.set(sa_key, value))
+
+        await asyncio.gather(*writes)
+
+    @property
+    def should_poll(self):
+        """State is pushed by the coordinator."""
+        return False
+
+    @property
+    def available(self):
+        """Unavailable until the first data arrived from the device or the last run."""
+        return self._coordinator.available
+
+    @property
+    def extra_state_attributes(self):
+        """Flag values restored from the last run that the device has not confirmed yet."""
+        return {"stale": not self._sab.stale_keys.isdisjoint(_SA_KEYS)}
 
     @property
     def supported_features(self):
@@ -223,5 +223,5 @@ class SystemAIRClimate(ClimateEntity):
         return list(HA_PRESET_TO_SA)
 
     async def async_update(self):
-        """Retrieve latest state."""
-        await self._sab.poll_now()
+        """Request a refresh, coalesced and rate-limited by the coordinator."""
+        await self._coordinator.async_request_refresh()
@@ -1,4 +1,5 @@
 """Config flow for savecair integration."""
+import asyncio
 import logging
 
 import voluptuous as vol
@@ -6,13 +7,15 @@ import voluptuous as vol
 from homeassistant import config_entries, exceptions
 
 from .const import DOMAIN  # pylint:disable=unused-import
-from .systemair.save.api import SaveAPI
+from .systemair.save.probe import probe_login
 from .systemair.save.exceptions import InvalidDeviceError, InvalidIAMError, InvalidPasswordError
 
 _LOGGER = logging.getLogger(__name__)
 
 
 DATA_SCHEMA = vol.Schema({"iam_id": str, "password": str})
+REAUTH_SCHEMA = vol.Schema({"password": str})
+PROBE_TIMEOUT = 15
 
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -22,35 +25,59 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     CONNECTION_CLASS = config_entries.CONN_CLASS_LOCAL_PUSH
 
     def __init__(self):
-        self._session = SaveAPI()
+        self._reauth_entry = None
 
     async def async_step_user(self, user_input=None):
         """Handle the initial step."""
         errors = {}
         if user_input is not None:
-            try:
+            info, errors = await self._async_login(user_input)
+            if not errors:
+                return self.async_create_entry(title=info["machineID"], data=user_input)
 
-                # Connect to the savecair endpoint
-                await self._session.connect()
+        return self.async_show_form(
+            step_id="user", data_schema=DATA_SCHEMA, errors=errors
+        )
 
-                # Attempt to login into the savecair portal
-                info = await self._session.login(
-                    user_input["iam_id"], user_input["password"]
-                )
+    async def async_step_reauth(self, user_input=None):
+        """Handle credentials rejected by the device during setup."""
+        self._reauth_entry = self.hass.config_entries.async_get_entry(self.context["entry_id"])
+        return await self.async_step_reauth_confirm()
 
-                return self.async_create_entry(title=info["machineID"], data=user_input)
-            except ConnectionError:
-                errors["base"] = "cannot_connect"
-            except InvalidDeviceError:
-                errors["base"] = "invalid_device"
-            except InvalidIAMError:
-                errors["base"] = "invalid_auth"
-            except InvalidPasswordError:
-                errors["base"] = "invalid_password"
-            except Exception:  # pylint: disable=broad-except
-                _LOGGER.exception("Unexpected exception")
-                errors["base"] = "unknown"
+    async def async_step_reauth_confirm(self, user_input=None):
+        """Ask for a new password and reload the entry with it."""
+        errors = {}
+        if user_input is not None:
+            data = {**self._reauth_entry.data, "password": user_input["password"]}
+            _, errors = await self._async_login(data)
+            if not errors:
+                self.hass.config_entries.async_update_entry(self._reauth_entry, data=data)
+                await self.hass.config_entries.async_reload(self._reauth_entry.entry_id)
+                return self.async_abort(reason="reauth_successful")
 
         return self.async_show_form(
-            step_id="user", data_schema=DATA_SCHEMA, errors=errors
+            step_id="reauth_confirm",
+            data_schema=REAUTH_SCHEMA,
+            description_placeholders={"iam_id": self._reauth_entry.data["iam_id"]},
+            errors=errors,
         )
+
+    async def _async_login(self, user_input):
+        """Try the credentials. Returns the login info and the form errors."""
+        errors = {}
+        try:
+            machine_id = await probe_login(user_input["iam_id"], user_input["password"], timeout=PROBE_TIMEOUT)
+            return {"machineID": machine_id}, errors
+        except (ConnectionError, asyncio.TimeoutError):
+            errors["base"] = "cannot_connect"
+        except InvalidDeviceError:
+            errors["base"] = "invalid_device"
+        except InvalidIAMError:
+            errors["base"] = "invalid_auth"
+        except InvalidPasswordError:
+            errors["base"] = "invalid_password"
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Unexpected exception")
+            errors["base"] = "unknown"
+
+        return None, errors
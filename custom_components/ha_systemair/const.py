@@ -1,8 +1,7 @@
 """Constants for the savecair integration."""
 
 DOMAIN = "systemair"
-
-SIGNAL_SYSTEMAIR_UPDATE_RECEIVED = "systemair_update_received"
+DATA_HUB = "systemair_hub"
 
 # Presets
 PRESET_AUTO = "auto"
@@ -14,6 +13,6 @@ PRESET_HOLIDAY = "holiday"
 PRESET_IDLE = "idle"
 
 # Rear / Write
-ATTR_TARGET_TEMPERATURE = "main_temperature_offset"
+ATTR_TARGET_TEMPERATURE = "target_temperature"
 
 
@@ -0,0 +1,177 @@
+"""Coordinator for the savecair integration."""
+import asyncio
+import logging
+
+from homeassistant.config_entries import SOURCE_REAUTH
+from homeassistant.core import callback
+from homeassistant.helpers.debounce import Debouncer
+
+from .const import DOMAIN
+from .systemair.save.backoff import Backoff
+from .systemair.save.exceptions import (
+    InvalidDeviceError,
+    InvalidIAMError,
+    InvalidPasswordError,
+    ResponseError,
+    UnknownError,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+REQUEST_REFRESH_COOLDOWN = 30
+STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 60
+START_TIMEOUT = 60
+
+
+class SystemAIRCoordinator:
+    """Share one SaveAPI between entities, push changes to them and rate-limit refreshes."""
+
+    def __init__(self, hass, api, store=None):
+        """
+        Initialize the coordinator.
+        :param store: homeassistant.helpers.storage.Store keeping a snapshot of the state across restarts
+        """
+        self.hass = hass
+        self.api = api
+        self._store = store
+        self._start_task = None
+        self._entry = None
+        self._available = False
+        self._listeners = {}
+        self._debounced_refresh = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=REQUEST_REFRESH_COOLDOWN,
+            immediate=True,
+            function=self._async_refresh,
+        )
+
+        api.add_listener_on_change(self._on_change)
+        api.add_listener_on_update(self._on_connection_event)
+        api.add_listener_on_close(self._on_connection_event)
+        api.add_listener_on_error(self._on_error)
+
+    @property
+    def available(self):
+        """
+        Entities are available while logged in with data, or while showing values restored from the last run
+        before the device has answered for the first time.
+        """
+        if self.api.stale and self.api.seconds_since_update is None:
+            return True
+        return self.api.authenticated and len(self.api.state) > 0
+
+    @callback
+    def async_start(self, entry):
+        """Connect, log in and read the first snapshot in the background, so setup does not wait for the cloud."""
+        self._entry = entry
+        self._start_task = self.hass.async_create_task(self._async_start(entry))
+
+    async def async_stop(self):
+        if self._start_task is not None and not self._start_task.done():
+            self._start_task.cancel()
+            try:
+                await self._start_task
+            except asyncio.CancelledError:
+                pass
+
+    async def _async_start(self, entry):
+        backoff = Backoff(first=10.0, initial=30.0, maximum=600.0)
+        while True:
+            try:
+                await asyncio.wait_for(self._async_connect(), START_TIMEOUT)
+                return
+            except (InvalidPasswordError, InvalidIAMError) as err:
+                _LOGGER.error("Savecair rejected the credentials of %s: %s", self.api.iam_id, err)
+                self._async_start_reauth(entry)
+                return
+            except (asyncio.TimeoutError, ConnectionError, InvalidDeviceError, ResponseError, UnknownError) as err:
+                delay = backoff.next()
+                _LOGGER.warning(
+                    "Could not connect to %s (%s), retrying in %.0f seconds",
+                    self.api.iam_id, str(err) or "timed out", delay
+                )
+                await asyncio.sleep(delay)
+
+    async def _async_connect(self):
+        """Connect and log in, then wait for the first values from the snapshot read the unit sends itself."""
+        await self.api.connect()
+        await self.api.login()
+        if self.api.subscribed_sensors:
+            await self.api.wait_for_update()
+        self._update_available()
+
+    @callback
+    def _async_start_reauth(self, entry):
+        """Stop reconnecting with the rejected credentials and ask for new ones. Reauth reloads the entry."""
+        self.hass.async_create_task(self.api.close())
+        self.hass.async_create_task(
+            self.hass.config_entries.flow.async_init(
+                DOMAIN, context={"source": SOURCE_REAUTH, "entry_id": entry.entry_id}, data=entry.data
+            )
+        )
+
+    async def _on_error(self, err):
+        if isinstance(err, (InvalidPasswordError, InvalidIAMError)) and self._entry is not None:
+            self._async_start_reauth(self._entry)
+
+    async def _on_connection_event(self, *args):
+        self._update_available()
+
+    @callback
+    def _update_available(self):
+        """Write the state of every entity when availability flipped."""
+        available = self.available
+        if available == self._available:
+            return
+
+        self._available = available
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    @callback
+    def async_add_listener(self, update_callback, keys=None):
+        """
+        Call update_callback when one of keys changes, or on any change when keys is None.
+        The unit only reads keys some listener is subscribed to.
+        """
+        keys = frozenset(keys) if keys is not None else None
+        self._listeners[update_callback] = keys
+        if keys is not None:
+            self.api.subscribe(keys)
+
+        @callback
+        def remove_listener():
+            if update_callback not in self._listeners:
+                return
+            if self._listeners.pop(update_callback) is not None:
+                self.api.unsubscribe(keys)
+
+        return remove_listener
+
+    async def _on_change(self, changes):
+        for update_callback, keys in list(self._listeners.items()):
+            if keys is None or not keys.isdisjoint(changes):
+                update_callback()
+
+        if self._store is not None:
+            self._store.async_delay_save(self.api.export_snapshot, SNAPSHOT_SAVE_DELAY)
+
+    async def async_restore(self):
+        """Fill the API state from the snapshot of the last run, marked stale until fresh values arrive."""
+        if self._store is None:
+            return
+
+        if self.api.restore_snapshot(await self._store.async_load()):
+            _LOGGER.debug("Restored %d values of %s from the last run", len(self.api.state), self.api.iam_id)
+
+    async def async_request_refresh(self):
+        """Request a read from the device. Requests within the cooldown are coalesced into one."""
+        await self._debounced_refresh.async_call()
+
+    async def _async_refresh(self):
+        try:
+            await self.api.poll_now()
+        except (ConnectionError, asyncio.TimeoutError, ResponseError) as err:
+            _LOGGER.warning("Could not refresh savecair state: %s", err)
@@ -0,0 +1,44 @@
+"""Base entity of the savecair integration."""
+from homeassistant.helpers.entity import Entity
+
+from .const import DOMAIN
+
+
+class SystemAIREntity(Entity):
+    """
+    An entity showing one key of SaveAPI.state. It holds no copy of the value and only subscribes to its own key,
+    so it is written exactly when that key changes. Disabled entities are never added and never subscribe,
+    so keys that are not enabled by default are not read until the user enables them.
+    """
+
+    def __init__(self, coordinator, key, name=None, enabled_default=True):
+        self._coordinator = coordinator
+        self._sab = coordinator.api
+        self._key = key
+        self._name = name if name else key.replace("_", " ")
+        self._enabled_default = enabled_default
+
+    async def async_added_to_hass(self):
+        self.async_on_remove(
+            self._coordinator.async_add_listener(self.async_write_ha_state, (self._key,))
+        )
+
+    @property
+    def should_poll(self):
+        return False
+
+    @property
+    def available(self):
+        return self._coordinator.available and self._key in self._sab.state
+
+    @property
+    def entity_registry_enabled_default(self):
+        return self._enabled_default
+
+    @property
+    def name(self):
+        return "%s %s" % (DOMAIN, self._name)
+
+    @property
+    def unique_id(self):
+        return "%s_%s" % (self._sab.iam_id, self._key)
@@ -0,0 +1,134 @@
+"""Sensors of the savecair integration: temperatures, humidity, fan speeds, filter time, derived values and metrics."""
+from homeassistant.components.sensor import (
+    STATE_CLASS_MEASUREMENT,
+    STATE_CLASS_TOTAL_INCREASING,
+    SensorEntity,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import (
+    DEVICE_CLASS_ENERGY,
+    DEVICE_CLASS_HUMIDITY,
+    DEVICE_CLASS_POWER,
+    DEVICE_CLASS_TEMPERATURE,
+)
+
+from .const import DOMAIN
+from .entity import SystemAIREntity
+from .systemair.save.const import (
+    SENSOR_CURRENT_HUMIDITY,
+    SENSOR_FAN_SPEED_EXTRACT,
+    SENSOR_FAN_SPEED_SUPPLY,
+    SENSOR_FILTER_TIME,
+    SENSOR_HEAT_RECOVERY_EFFICIENCY,
+    SENSOR_HEAT_RECOVERY_ENERGY,
+    SENSOR_HEAT_RECOVERY_POWER,
+    SENSOR_TEMPERATURE_EXTRACT,
+    SENSOR_TEMPERATURE_OUTDOOR,
+    SENSOR_TEMPERATURE_SUPPLY,
+)
+from .systemair.save.registry import SENSORS
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+# key -> (name, unit, function of SaveAPI returning the value)
+METRIC_SENSORS = {
+    "frames_received": ("frames received", "frames", lambda api: sum(api.metrics.received.values())),
+    "frames_sent": ("frames sent", "frames", lambda api: sum(api.metrics.sent.values())),
+    "read_latency": ("read latency p95", "ms", lambda api: _ms(api.metrics.histogram("read").percentile(95))),
+    "write_latency": ("write confirmation latency p95", "ms",
+                      lambda api: _ms(api.metrics.histogram("write").percentile(95))),
+    "reconnects": ("reconnects", None, lambda api: api.reconnects),
+    "seconds_since_update": ("time since last update", "s",
+                             lambda api: round(api.seconds_since_update) if api.seconds_since_update is not None
+                             else None),
+    "listener_backlog": ("listener backlog", "calls",
+                         lambda api: sum(x["pending"] for group in api.listener_stats().values() for x in group)),
+}
+
+# key -> (name, device class, state class)
+SENSOR_TYPES = {
+    SENSOR_TEMPERATURE_OUTDOOR: ("outdoor temperature", DEVICE_CLASS_TEMPERATURE, STATE_CLASS_MEASUREMENT),
+    SENSOR_TEMPERATURE_SUPPLY: ("supply temperature", DEVICE_CLASS_TEMPERATURE, STATE_CLASS_MEASUREMENT),
+    SENSOR_TEMPERATURE_EXTRACT: ("extract temperature", DEVICE_CLASS_TEMPERATURE, STATE_CLASS_MEASUREMENT),
+    SENSOR_CURRENT_HUMIDITY: ("humidity", DEVICE_CLASS_HUMIDITY, STATE_CLASS_MEASUREMENT),
+    SENSOR_FAN_SPEED_SUPPLY: ("supply fan speed", None, STATE_CLASS_MEASUREMENT),
+    SENSOR_FAN_SPEED_EXTRACT: ("extract fan speed", None, STATE_CLASS_MEASUREMENT),
+    SENSOR_FILTER_TIME: ("filter days left", None, None),
+    SENSOR_HEAT_RECOVERY_EFFICIENCY: ("heat recovery efficiency", None, STATE_CLASS_MEASUREMENT),
+    SENSOR_HEAT_RECOVERY_POWER: ("heat recovery power", DEVICE_CLASS_POWER, STATE_CLASS_MEASUREMENT),
+    SENSOR_HEAT_RECOVERY_ENERGY: ("heat recovery energy", DEVICE_CLASS_ENERGY, STATE_CLASS_TOTAL_INCREASING),
+}
+
+# Core readings, the fan speeds and heat recovery values start disabled so a default install does not read them
+ENABLED_BY_DEFAULT = frozenset((
+    SENSOR_TEMPERATURE_OUTDOOR,
+    SENSOR_TEMPERATURE_SUPPLY,
+    SENSOR_TEMPERATURE_EXTRACT,
+    SENSOR_CURRENT_HUMIDITY,
+    SENSOR_FILTER_TIME,
+))
+
+
+async def async_setup_entry(hass, config_entry: ConfigEntry, async_add_entities):
+    """Set up the sensors of a unit."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    entities = [SystemAIRSensor(coordinator, key) for key in SENSOR_TYPES]
+    entities += [SystemAIRMetricSensor(coordinator, key) for key in METRIC_SENSORS]
+    async_add_entities(entities)
+
+
+class SystemAIRSensor(SystemAIREntity, SensorEntity):
+    """A numeric value of the unit, read or derived."""
+
+    def __init__(self, coordinator, key):
+        name, self._device_class, self._state_class = SENSOR_TYPES[key]
+        super().__init__(coordinator, key, name, key in ENABLED_BY_DEFAULT)
+
+    @property
+    def device_class(self):
+        return self._device_class
+
+    @property
+    def state_class(self):
+        return self._state_class
+
+    @property
+    def native_unit_of_measurement(self):
+        return SENSORS[self._key].unit
+
+    @property
+    def native_value(self):
+        return self._sab.state.get(self._key)
+
+
+class SystemAIRMetricSensor(SensorEntity):
+    """A connection metric. Metrics change with every frame, so they are polled instead of pushed."""
+
+    def __init__(self, coordinator, key):
+        self._sab = coordinator.api
+        self._key = key
+        self._name, self._unit, self._value = METRIC_SENSORS[key]
+
+    @property
+    def name(self):
+        return "%s %s" % (DOMAIN, self._name)
+
+    @property
+    def unique_id(self):
+        return "%s_metric_%s" % (self._sab.iam_id, self._key)
+
+    @property
+    def entity_registry_enabled_default(self):
+        return False
+
+    @property
+    def native_unit_of_measurement(self):
+        return self._unit
+
+    @property
+    def native_value(self):
+        return self._value(self._sab)
@@ -0,0 +1,55 @@
+"""
+Micro-benchmarks of the frame codec on a full load_all READ response.
+
+    python -m systemair.benchmarks.codec
+    python -m systemair.benchmarks.codec --number 20000 --output codec.json
+
+Compares the standard library with the configured codec backend, and a freshly serialized READ frame with the
+cached one.
+"""
+import argparse
+import json
+import timeit
+
+from ..save import codec
+from ..save.command import _read, read
+from ..save.registry import DEVICE_SENSORS
+from ..save.simulator import default_state
+
+
+def _stdlib_read(items):
+    return json.dumps(dict(type="READ", idsToRead=list(items)))
+
+
+def bench(number):
+    """Return microseconds per operation for every benchmark."""
+    response = json.dumps({"type": "READ", "readValues": default_state()})
+    response_bytes = response.encode()
+    sensors = list(DEVICE_SENSORS)
+
+    cases = {
+        "decode_read_response_json_us": lambda: json.loads(response),
+        "decode_read_response_codec_us": lambda: codec.loads(response),
+        "decode_read_response_codec_bytes_us": lambda: codec.loads(response_bytes),
+        "encode_read_request_json_us": lambda: _stdlib_read(sensors),
+        "encode_read_request_uncached_us": lambda: _read.__wrapped__(tuple(sensors)),
+        "encode_read_request_cached_us": lambda: read(sensors),
+    }
+    return {name: min(timeit.repeat(case, number=number, repeat=5)) / number * 1e6 for name, case in cases.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the SaveCair frame codec")
+    parser.add_argument("--number", type=int, default=5000, help="Operations per timed repeat")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    report = {"backend": codec.BACKEND, "results": bench(args.number)}
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Benchmarks for the SaveAPI message pipeline.
+
+    python -m systemair.benchmarks.pipeline --output bench.json
+    python -m systemair.benchmarks.pipeline --compare bench.json
+
+Results are written as JSON so runs on different commits can be compared.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import websockets
+
+from ..save import api as _api, simulator as _simulator
+from ..save.api import SaveAPI
+from ..save.const import SA_FAN_MODE_HIGH, SA_FAN_MODE_LOW, SENSOR_TEMPERATURE_OUTDOOR, SYNC_MODE_PUSH
+from ..save.simulator import SavecairSimulator, default_state
+
+# Only allocations with a client library frame in their traceback count, the simulator shares the process
+CLIENT_FILTERS = (
+    tracemalloc.Filter(True, os.path.join(os.path.dirname(_api.__file__), "*"), all_frames=True),
+    tracemalloc.Filter(False, _simulator.__file__, all_frames=True),
+)
+TRACE_DEPTH = 32
+
+# metric -> True when a higher value is better
+METRICS = {
+    "pipeline_messages_per_second": True,
+    "write_confirm_latency_p50_ms": False,
+    "write_confirm_latency_p95_ms": False,
+    "memory_per_unit_kib": False,
+    "idle_cpu_percent": False,
+}
+
+
+class FakeConnection:
+    """Stands in for a websocket connection and replays a list of raw frames, then idles."""
+
+    def __init__(self, frames):
+        self._frames = iter(frames)
+        self.open = True
+
+    async def recv(self):
+        await asyncio.sleep(0)
+        for frame in self._frames:
+            return frame
+        await asyncio.get_event_loop().create_future()
+
+    async def send(self, data):
+        pass
+
+    async def close(self):
+        self.open = False
+
+
+def _frames(count):
+    """Build a READ snapshot of every sensor followed by VALUE_CHANGED pushes of a single temperature."""
+    state = default_state()
+    frames = [json.dumps({"type": "READ", "readValues": state})]
+    for i in range(count - 1):
+        frames.append(json.dumps({"type": "VALUE_CHANGED", "changedValues": {SENSOR_TEMPERATURE_OUTDOOR: i % 300}}))
+    return frames
+
+
+def _client(simulator, **kwargs):
+    api = SaveAPI(iam_id=simulator.iam_id, password=simulator.password, load_all=True, **kwargs)
+    api._url = simulator.url
+    return api
+
+
+async def bench_pipeline(count):
+    """Frames per second from _handler through json.loads, on_message, the state update and a listener."""
+    api = SaveAPI(load_all=True)
+
+    async def listener(changes):
+        pass
+
+    api.add_listener_on_change(listener)
+    frames = _frames(count)
+
+    start = time.perf_counter()
+    handler = asyncio.get_event_loop().create_task(api._handler(FakeConnection(frames)))
+    while True:
+        stats = api.listener_stats()["change"][0]
+        if stats["calls"] + stats["dropped"] + stats["merged"] >= count:
+            break
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+
+    handler.cancel()
+    await asyncio.gather(handler, return_exceptions=True)
+
+    await api.close()
+    return {"pipeline_messages_per_second": count / elapsed}
+
+
+async def bench_write_latency(simulator, count):
+    """Milliseconds from issuing a setter until the device confirmed it with VALUE_CHANGED."""
+    api = _client(simulator, write_delay=0)
+    await api.connect()
+    await api.login()
+
+    latencies = []
+    for i in range(count):
+        start = time.perf_counter()
+        confirmation = await api.set_fan_mode(SA_FAN_MODE_HIGH if i % 2 else SA_FAN_MODE_LOW)
+        await confirmation
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    await api.close()
+    latencies.sort()
+    return {
+        "write_confirm_latency_p50_ms": latencies[len(latencies) // 2],
+        "write_confirm_latency_p95_ms": latencies[int(len(latencies) * 0.95)],
+    }
+
+
+async def bench_memory(simulator, units):
+    """KiB allocated by the client library per connected, logged in unit holding a full snapshot."""
+    tracemalloc.start(TRACE_DEPTH)
+    before = tracemalloc.take_snapshot().filter_traces(CLIENT_FILTERS)
+
+    apis = [_client(simulator, sync_mode=SYNC_MODE_PUSH) for _ in range(units)]
+    for api in apis:
+        await api.connect()
+        await api.login()
+        await api.poll_now()
+
+    after = tracemalloc.take_snapshot().filter_traces(CLIENT_FILTERS)
+    tracemalloc.stop()
+
+    await asyncio.gather(*[api.close() for api in apis])
+    allocated = sum(x.size_diff for x in after.compare_to(before, "filename"))
+    return {"memory_per_unit_kib": allocated / units / 1024}
+
+
+async def bench_idle_cpu(simulator, duration):
+    """Process CPU time used by a connected unit in push mode that receives nothing."""
+    api = _client(simulator, sync_mode=SYNC_MODE_PUSH)
+    await api.connect()
+    await api.login()
+    await asyncio.sleep(1)
+
+    cpu, wall = time.process_time(), time.perf_counter()
+    await asyncio.sleep(duration)
+    cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+
+    await api.close()
+    return {"idle_cpu_percent": cpu / wall * 100}
+
+
+async def run(args):
+    results = {}
+    results.update(await bench_pipeline(args.messages))
+
+    async with SavecairSimulator() as simulator:
+        results.update(await bench_write_latency(simulator, args.writes))
+        results.update(await bench_memory(simulator, args.units))
+        results.update(await bench_idle_cpu(simulator, args.idle))
+
+    return results
+
+
+def _revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline, results, threshold):
+    """Print the change of every metric and return the names of metrics that regressed more than threshold."""
+    regressions = []
+    for name, higher_is_better in METRICS.items():
+        old, new = baseline["results"].get(name), results.get(name)
+        if not old or new is None:
+            continue
+
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        if worse > threshold:
+            regressions.append(name)
+        print("%-32s %12.3f -> %12.3f  %+6.1f%%%s" % (
+            name, old, new, change * 100, "  REGRESSION" if worse > threshold else ""
+        ))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the SaveAPI message pipeline")
+    parser.add_argument("--messages", type=int, default=20000, help="Frames pushed through the pipeline")
+    parser.add_argument("--writes", type=int, default=200, help="Writes timed against the simulator")
+    parser.add_argument("--units", type=int, default=20, help="Units connected for the memory benchmark")
+    parser.add_argument("--idle", type=float, default=5.0, help="Seconds measured for the idle CPU benchmark")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Compare against a previous JSON result file")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative change counted as a regression")
+    args = parser.parse_args()
+
+    results = asyncio.get_event_loop().run_until_complete(run(args))
+    report = {
+        "revision": _revision(),
+        "python": platform.python_version(),
+        "websockets": getattr(websockets, "__version__", None),
+        "timestamp": time.time(),
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+    print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare) as fh:
+            regressions = compare(json.load(fh), results, args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
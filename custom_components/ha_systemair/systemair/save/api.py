@@ -1,92 +1,222 @@
 import asyncio
-import json
 import logging
 import os
-import socket
+import time
+from collections import Counter
 
 import websockets
-from websockets.protocol import State
-from systemair.savecair import const
-from systemair.savecair.command import read, login, write
-from systemair.savecair.const import SA_FAN_MODE_MEDIUM, SA_FAN_MODE_LOW, SA_FAN_MODE_OFF, SA_FAN_MODE_HIGH, \
+from . import codec
+from .command import read, login, write
+from .backoff import Backoff
+from .dispatch import ListenerGroup
+from .tracker import RequestTracker, _retrieve
+from .scheduler import PollScheduler
+from .registry import AIRFLOW_BY_OPERATION, DEPENDENCIES, DEVICE_SENSORS, POLL_PERIODS, POSTPROCESS_MAP, \
+    device_sensors_for
+from .state import SensorState
+from .log import RateLimitedLog
+from .metrics import Metrics
+from .history import SensorHistory
+from .derived import DerivedMetrics
+from .const import SA_FAN_MODE_MEDIUM, SA_FAN_MODE_LOW, SA_FAN_MODE_OFF, SA_FAN_MODE_HIGH, \
     SA_OPERATION_MODE_REFRESH, SA_OPERATION_MODE_FIREPLACE, SA_OPERATION_MODE_CROWDED, SA_OPERATION_MODE_HOLIDAY, \
     SA_OPERATION_MODE_IDLE, SA_OPERATION_MODE_AUTO, SA_OPERATION_MODE_MANUAL, SENSOR_CURRENT_OPERATION, \
-    SENSOR_CUSTOM_FAN_MODE, SENSOR_CUSTOM_OPERATION, SA_OPERATION_MODE_OFF, POSTPROCESS_MAP, SENSOR_TARGET_TEMPERATURE, \
-    SENSOR_MODE_CHANGE_REQUEST, SENSOR_CURRENT_FAN_MODE, USER_MODE
+    SENSOR_CUSTOM_FAN_MODE, SENSOR_CUSTOM_OPERATION, SA_OPERATION_MODE_OFF, SENSOR_TARGET_TEMPERATURE, \
+    SENSOR_MODE_CHANGE_REQUEST, SENSOR_CURRENT_FAN_MODE, USER_MODE, SYNC_MODE_POLL, SYNC_MODE_PUSH, \
+    REQUEST_LOGIN, REQUEST_READ, REQUEST_WRITE, WRITE_CONFIRM_MAP
 
-from custom_components.ha_systemair.systemair.save.exceptions import (
+from .exceptions import (
     InvalidDeviceError,
     InvalidIAMError,
     InvalidPasswordError,
+    ResponseError,
     UnknownError
 )
 
-
-logging.basicConfig(level=logging.DEBUG)
 _LOGGER = logging.getLogger(__name__)
+_LOG_LIMITED = RateLimitedLog(_LOGGER)
 DIR_PATH = os.path.dirname(os.path.realpath(__file__))
 RETRY_TIMER = 15
+# A connection has to stay up this many seconds before the reconnect backoff starts over
+STABLE_UPTIME = 60
+SNAPSHOT_VERSION = 1
+SAVECAIR_URL = "wss://homesolutions.systemair.com/ws/"
+
+
+def login_error(error_type):
+    """Return the exception to raise for the errorTypeId of an ERROR frame answering LOGIN."""
+    if error_type == "WRONG_PASSWORD":
+        return InvalidPasswordError("Incorrect password")
+    elif error_type == "ACCESS_DENIED_SEVERE":
+        return InvalidIAMError("Incorrect IAM")
+    elif error_type == "UNIT_NOT_CONNECTED":
+        return InvalidDeviceError("Incorrect device")
+    return UnknownError("An error occured during login.")
 
 
 class SystemAIRSocket:
 
     def __init__(self,
-                 url="wss://homesolutions.systemair.com/ws/",
+                 url=SAVECAIR_URL,
                  reconnect=True,
-                 reconnect_interval=60
+                 reconnect_interval=300,
+                 backoff=None,
+                 reconnect_limit=None
                  ):
         self._url = url
+        self._reconnect_enabled = reconnect
         self._reconnect = reconnect
-        self._reconnect_interval = reconnect_interval
+        self._backoff = backoff if backoff else Backoff(maximum=reconnect_interval)
+        self._reconnect_limit = reconnect_limit
         self.ctx = None
 
-        self._listener_on_message = [
-            self.on_message
-        ]
-        self._listener_on_open = [
-            self.on_open
-        ]
-        self._listener_on_close = [
-            self.on_close
-        ]
+        """Connection statistics."""
+        self.reconnect_attempts = 0
+        self.reconnects = 0
+        self._downtime = 0.0
+        self._down_since = None
+        self.metrics = Metrics()
 
-        self._listener_on_error = [
-            self.on_error
-        ]
+        self._listener_on_message = ListenerGroup()
+        self._listener_on_open = ListenerGroup()
+        self._listener_on_close = ListenerGroup()
+        self._listener_on_error = ListenerGroup()
+        self._listener_on_change = ListenerGroup()
 
         self._e_auth_ok = asyncio.Event()
-        self._e_wait_message = asyncio.Event()
+        self._tracker = RequestTracker(self.metrics)
+
+        self._e_open = asyncio.Event()
+        self._supervisor = None
+        self._tasks = set()
 
     def add_listener_on_error(self, coro):
-        self._listener_on_error.append(coro)
+        self._listener_on_error.add(coro)
 
     def add_listener_on_close(self, coro):
-        self._listener_on_close.append(coro)
+        self._listener_on_close.add(coro)
 
     def add_listener_on_open(self, coro):
-        self._listener_on_open.append(coro)
+        self._listener_on_open.add(coro)
 
     def add_listener_on_update(self, coro):
-        self._listener_on_message.append(coro)
+        self._listener_on_message.add(coro)
+
+    def add_listener_on_change(self, coro, keys=None):
+        """Call coro with {key: (old, new)} for changed values, optionally only for the given keys."""
+        self._listener_on_change.add(coro, keys)
+
+    def listener_stats(self):
+        """Return call counts, errors, drops and timings for every registered listener."""
+        return {
+            "message": self._listener_on_message.stats(),
+            "open": self._listener_on_open.stats(),
+            "close": self._listener_on_close.stats(),
+            "error": self._listener_on_error.stats(),
+            "change": self._listener_on_change.stats(),
+        }
+
+    def diagnostics(self):
+        """Return connection statistics, frame counters, latency histograms and listener stats."""
+        diagnostics = {
+            "connected": self.connected,
+            "reconnect_attempts": self.reconnect_attempts,
+            "reconnects": self.reconnects,
+            "downtime": self.downtime,
+            "pending_requests": len(self._tracker),
+            "listeners": self.listener_stats(),
+        }
+        diagnostics.update(self.metrics.as_dict())
+        return diagnostics
+
+    def _spawn(self, coro):
+        """Run a coroutine as a task owned by the current connection."""
+        task = asyncio.get_event_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    @property
+    def connected(self):
+        return self.ctx is not None and self.ctx.open
+
+    @property
+    def downtime(self):
+        """Total seconds spent disconnected after the first connection was lost."""
+        if self._down_since is None:
+            return self._downtime
+        return self._downtime + time.monotonic() - self._down_since
 
     async def connect(self):
+        """Start the connection supervisor and wait until it has connected."""
+        self._reconnect = self._reconnect_enabled
+        if self._supervisor is None or self._supervisor.done():
+            self._supervisor = asyncio.get_event_loop().create_task(self._supervise())
+
+        opened = asyncio.get_event_loop().create_task(self._e_open.wait())
         try:
-            self.ctx = await websockets.connect(self._url)
-            await self._on_open()
-            asyncio.get_event_loop().create_task(self._handler())
-            asyncio.get_event_loop().create_task(self._poll())
-        except socket.gaierror as e:
-            await self._on_error(e)
-            await self._on_close()
+            await asyncio.wait({opened, self._supervisor}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            opened.cancel()
+        return self.connected
+
+    async def close(self):
+        """Close the connection, stop reconnecting and wait for every owned task to finish."""
+        self._reconnect = False
+        task, self._supervisor = self._supervisor, None
+        if task is not None:
+            if self.ctx is not None:
+                await self.ctx.close()
+            else:
+                task.cancel()
+
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        await asyncio.gather(
+            self._listener_on_message.close(),
+            self._listener_on_open.close(),
+            self._listener_on_close.close(),
+            self._listener_on_error.close(),
+            self._listener_on_change.close(),
+        )
+
+    async def _supervise(self):
+        """Own the connection lifecycle: connect, run until closed and reconnect with backoff."""
+        while True:
+            try:
+                ctx = await websockets.connect(self._url)
+            except (OSError, asyncio.TimeoutError, websockets.InvalidHandshake) as e:
+                await self._on_error(e)
+            else:
+                opened = time.monotonic()
+                if self._down_since is not None:
+                    self.reconnects += 1
+                    self._downtime += opened - self._down_since
+                    self._down_since = None
+
+                await self._run(ctx)
+                self._down_since = time.monotonic()
+                if self._down_since - opened >= STABLE_UPTIME:
+                    self._backoff.reset()
+
+            if not self._reconnect:
+                return
+
+            delay = self._backoff.next()
+            self.reconnect_attempts += 1
+            _LOGGER.warning("Reconnecting to the savecair device in %.1f seconds", delay)
+            await asyncio.sleep(delay)
+            if self._reconnect_limit is not None:
+                await asyncio.sleep(self._reconnect_limit.delay())
 
     async def on_open(self):
         pass
 
     async def on_close(self):
-        if self._reconnect:
-            _LOGGER.warning("Attempting to reconnect to the savecair device")
-            await asyncio.sleep(self._reconnect_interval)
-            await self.connect()
+        pass
 
     async def on_error(self, err):
         pass
@@ -95,56 +225,82 @@ class SystemAIRSocket:
         pass
 
     async def _on_open(self):
-        for coro in self._listener_on_open:
-            await coro()
+        self._e_open.set()
+        await self.on_open()
+        self._listener_on_open.dispatch()
 
     async def _on_close(self):
         self.ctx = None
-        for coro in self._listener_on_close:
-            await coro()
+        self._e_open.clear()
+        self._tracker.fail_all(ConnectionError("Connection to the savecair endpoint was closed"))
+        await self.on_close()
+        self._listener_on_close.dispatch()
 
     async def _on_error(self, err):
-        for coro in self._listener_on_error:
-            await coro(err)
+        await self.on_error(err)
+        self._listener_on_error.dispatch(err)
 
     async def _on_message(self, msg):
-        for coro in self._listener_on_message:
-            await coro(msg)
+        self.metrics.received[msg.get("type")] += 1
+        try:
+            await self.on_message(msg)
+        finally:
+            self._tracker.resolve(msg)
+        self._listener_on_message.dispatch(msg)
+
+    async def _run(self, ctx):
+        """Run a single connection from open to close."""
+        self.ctx = ctx
+        await self._on_open()
+        self._spawn(self._poll())
+        try:
+            await self._handler(ctx)
+        finally:
+            for task in list(self._tasks):
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            await ctx.close()
 
-    async def _handler(self):
+        await self._on_close()
+
+    async def _handler(self, ctx):
+        """Receive frames until the connection is closed."""
         while True:
+            try:
+                data = await ctx.recv()
+            except websockets.ConnectionClosedOK:
+                return
+            except websockets.ConnectionClosedError as e:
+                await self._on_error(e)
+                return
 
-            while self.ctx is None or self.ctx.state != State.OPEN:
-                await asyncio.sleep(.5)
+            try:
+                await self._on_message(codec.loads(data))
+            except ValueError as e:
+                _LOGGER.error("Message from server is not JSON: %s", e)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Failed to process message: %s", data)
 
-            if self.ctx.state == State.CLOSING:
-                await self.ctx.wait_closed()
-                return
+    async def _poll(self):
+        pass
 
-            while self.ctx.state == State.OPEN:
-                try:
-                    data = await self.ctx.recv()
-                    data = json.loads(data)
-
-                    await self._on_message(data)
-                except websockets.ConnectionClosedError as e:
-                    await self._on_error(e)
-                except websockets.ConnectionClosedOK as e:
-                    await self._on_close()
-                except ValueError as e:
-                    _LOGGER.error("Message from server is not JSON: %s", e)
-                finally:
-                    self._e_wait_message.set()
-
-            await asyncio.sleep(.1)
-
-    async def send(self, data):
-        """Send a message through the websocket channel."""
+    async def send(self, data, kind=None):
+        """Send a message through the websocket channel. kind is the frame type, used for the frame counters."""
         if self.ctx is None or not self.ctx.open:
-            _LOGGER.warning("Tried to send query when connection does not exists!")
+            _LOG_LIMITED.warning("send", "Tried to send query when connection does not exists!")
             return False
 
-        await self.ctx.send(str(data))
+        await self.ctx.send(data)
+        self.metrics.sent[kind] += 1
+
+    async def request(self, data, kind, keys=(), timeout=None):
+        """Send a message and wait for the response that answers it."""
+        future = self._tracker.expect(kind, keys, timeout)
+        if await self.send(data, kind) is False:
+            self._tracker.discard(future)
+            raise ConnectionError("Not connected to the savecair endpoint")
+
+        return await future
 
 
 class SaveAPI(SystemAIRSocket):
@@ -154,23 +310,55 @@ class SaveAPI(SystemAIRSocket):
     class FanmodeDoesNotExistsError(Exception):
         pass
 
-    @staticmethod
-    def _load_sensors():
-        for sensor in [x for x in dir(const) if "SENSOR_" in x]:
-            yield getattr(const, sensor)
-
-    def __init__(self, iam_id=None, password=None, poll_interval=60, load_all=False):
-        super().__init__()
+    def __init__(self, iam_id=None, password=None, poll_interval=60, load_all=False,
+                 sync_mode=SYNC_MODE_POLL, push_timeout=600, poll_tiers=None, write_delay=0.05,
+                 write_timeout=30, hub=None, backoff=None, reconnect_limit=None, history=True, derived=True):
+        super().__init__(backoff=backoff, reconnect_limit=reconnect_limit)
+        self._hub = hub
         self._iam_id = iam_id
         self._password = password
+        self._logged_in = False
 
-        """Load parameters from file or arguments."""
-        self.available_sensors = set(SaveAPI._load_sensors())
-        self.subscribed_sensors = set(self.available_sensors) if load_all else set()
+        """Sensors the device can be asked for, locally computed keys are never read."""
+        self.available_sensors = set(DEVICE_SENSORS)
 
-        self._poll_interval = poll_interval
+        """Sensors are read only while someone is subscribed to them, the full READ frame is built once per set."""
+        self._interest = Counter()
+        self._subscribed = frozenset()
+        self._read_all = None
 
-        self.state = {}
+        self._poll_interval = poll_interval
+        if poll_tiers is None:
+            self._scheduler = PollScheduler(poll_interval, POLL_PERIODS)
+        else:
+            self._scheduler = PollScheduler.from_tiers(poll_interval, poll_tiers)
+
+        """Push mode: one snapshot after login, then re-read only when pushes go quiet or a gap is seen."""
+        self._sync_mode = sync_mode
+        self._push_timeout = push_timeout
+        self._last_sync = None
+        self._last_update = None
+        self._snapshot_keys = None
+        self._reread = set()
+        self._e_resync = asyncio.Event()
+        self._e_updated = asyncio.Event()
+
+        """Sensor values live in a fixed-schema store, protocol metadata (type, errorTypeId, machineID) in info."""
+        self.state = SensorState()
+        self.info = {}
+        self.history = SensorHistory() if history else None
+        self.derived = DerivedMetrics() if derived else None
+        self._stale = set()
+
+        """Writes issued within write_delay seconds are merged into one WRITE frame."""
+        self._write_delay = write_delay
+        self._write_timeout = write_timeout
+        self._pending_writes = {}
+        self._write_future = None
+        self._optimistic = {}
+
+        if load_all:
+            self.subscribe(self.available_sensors)
 
         self._fan_mode = {
             SA_FAN_MODE_OFF: self.set_fan_off,
@@ -179,15 +367,7 @@ class SaveAPI(SystemAIRSocket):
             SA_FAN_MODE_HIGH: self.set_fan_high
         }
 
-        self._custom_fan_map = {
-            SA_OPERATION_MODE_REFRESH: "user_mode_refresh_supply",
-            SA_OPERATION_MODE_FIREPLACE: "user_mode_fireplace_supply",
-            SA_OPERATION_MODE_CROWDED: "user_mode_crowded_supply",
-            SA_OPERATION_MODE_HOLIDAY: "user_mode_holiday_supply",
-            SA_OPERATION_MODE_IDLE: "user_mode_away_supply",
-            SA_OPERATION_MODE_AUTO: "user_mode_auto_supply",
-            SA_OPERATION_MODE_MANUAL: "main_airflow"
-        }
+        self._custom_fan_map = dict(AIRFLOW_BY_OPERATION)
 
         self._opmode = {
             SA_OPERATION_MODE_AUTO: self.set_auto_mode,
@@ -200,20 +380,161 @@ class SaveAPI(SystemAIRSocket):
         }
 
     async def _poll(self):
+        await self._e_auth_ok.wait()
 
-        while True:
+        if self._hub is not None:
+            self._hub.schedule(self, stagger=True)
+            return
+
+        while self.connected:
+            self._e_resync.clear()
+            delay = await self.sync_step()
+            try:
+                await asyncio.wait_for(self._e_resync.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def sync_step(self):
+        """
+        Send whatever reads are due now.
+        :return: Seconds until the next step is needed, or None when not logged in
+        """
+        if not self.connected or not self._e_auth_ok.is_set():
+            return None
 
-            if not self.ctx or not self.ctx.state == State.OPEN:
-                break
-            await self._e_auth_ok.wait()
-            _LOGGER.warning("Updating sensors: %s" % self.subscribed_sensors)
-            await self.poll_now()
-            await asyncio.sleep(self._poll_interval)
+        if self._sync_mode == SYNC_MODE_PUSH:
+            return await self._sync_push()
+
+        sensors = self._scheduler.pop_due(self.subscribed_sensors, time.monotonic())
+        if sensors:
+            _LOGGER.debug("Reading %d due sensors", len(sensors))
+            await self._send_read(sensors)
+
+        delay = self._scheduler.next_due(self.subscribed_sensors, time.monotonic())
+        return self._poll_interval if delay is None else delay
+
+    async def _sync_push(self):
+        """Read the full state only when the push stream can no longer be trusted."""
+        now = time.monotonic()
+
+        if self._last_sync is None or now - self._last_update >= self._push_timeout:
+            sensors, frame = self._read_subscribed()
+            _LOGGER.debug("Reading full snapshot of %d sensors", len(sensors))
+            self._reread.clear()
+            self._last_sync = self._last_update = now
+            if sensors:
+                self._snapshot_keys = set(sensors)
+                await self._send_read(sensors, frame=frame)
+        elif self._reread:
+            _LOGGER.debug("Re-reading sensors missing from snapshot: %s", self._reread)
+            keys, self._reread = self._reread, set()
+            await self._send_read(keys)
+
+        return max(self._push_timeout - (time.monotonic() - self._last_update), 0)
+
+    async def _send_read(self, sensors, timeout=30, frame=None):
+        """Send a READ without waiting for the response. It is still tracked, so its round trip is measured."""
+        sensors = list(sensors)
+        future = self._tracker.expect(REQUEST_READ, sensors, timeout)
+        if await self.send(frame or read(sensors), REQUEST_READ) is False:
+            self._tracker.discard(future)
+
+    def _wake(self):
+        """Run the next sync step now instead of waiting for its deadline."""
+        self._e_resync.set()
+        if self._hub is not None and self._e_auth_ok.is_set():
+            self._hub.schedule(self)
+
+    @property
+    def subscribed_sensors(self):
+        """Device sensors at least one consumer is subscribed to. Only these are read."""
+        return self._subscribed
+
+    def subscribe(self, keys):
+        """
+        Register interest in keys, reference counted per sensor.
+        Locally computed keys subscribe the device sensors they are computed from.
+        Sensors nobody wanted before are read on the next sync step.
+        """
+        added = []
+        for sensor in device_sensors_for(keys):
+            self._interest[sensor] += 1
+            if self._interest[sensor] == 1:
+                added.append(sensor)
+
+        if added:
+            _LOGGER.debug("Subscribed to %s", added)
+            self._set_subscribed()
+            self._scheduler.forget(added)
+            if self._sync_mode == SYNC_MODE_PUSH and self._last_sync is not None:
+                self._reread.update(added)
+            self._wake()
+
+    def unsubscribe(self, keys):
+        """Drop interest registered with subscribe. Sensors nobody wants anymore are no longer read."""
+        removed = False
+        for sensor in device_sensors_for(keys):
+            if sensor not in self._interest:
+                continue
+            self._interest[sensor] -= 1
+            if self._interest[sensor] <= 0:
+                del self._interest[sensor]
+                removed = True
+
+        if removed:
+            self._set_subscribed()
+            self._reread.intersection_update(self._subscribed)
+
+    def _set_subscribed(self):
+        self._subscribed = frozenset(self._interest)
+        self._read_all = None
+
+    def _read_subscribed(self):
+        """Return the subscribed sensors and their READ frame, rebuilt only when the subscription changed."""
+        if self._read_all is None:
+            sensors = list(self._subscribed)
+            self._read_all = (sensors, read(sensors))
+        return self._read_all
+
+    def set_poll_period(self, sensor, period):
+        """Override how often a sensor is read in poll mode."""
+        self._scheduler.set_period(sensor, period)
+
+    def resync(self):
+        """Force a full re-read on the next sync cycle."""
+        self._last_sync = None
+        self._scheduler.reset()
+        self._wake()
+
+    async def read_sensors(self, sensors, timeout=30):
+        """Read sensors and return the raw values from the matching READ response."""
+        sensors = list(sensors)
+        return await self.request(read(sensors), REQUEST_READ, sensors, timeout)
+
+    async def wait_for_update(self):
+        """Wait until the current connection has received a READ or VALUE_CHANGED frame."""
+        await self._e_updated.wait()
+
+    async def poll_now(self, timeout=30):
+        """Read every subscribed sensor and wait for the response."""
+        sensors, frame = self._read_subscribed()
+        if not sensors:
+            return {}
+        return await self.request(frame, REQUEST_READ, sensors, timeout)
+
+    def _update(self, k, v, changes):
+        """Store a value and record it in changes when it differs from the cached one."""
+        old = self.state.get(k)
+        try:
+            changed = self.state.set(k, v)
+        except KeyError:
+            _LOGGER.debug("Ignoring value of unknown sensor %s", k)
+            return
 
-    async def poll_now(self):
-        await self.send(read(list(self.subscribed_sensors)))
+        if changed:
+            changes[k] = (old, v)
 
-    async def _ha_postprocess(self):
+    def _ha_postprocess(self, changes):
         op_key = SENSOR_CURRENT_OPERATION
 
         if op_key not in self.state:
@@ -221,174 +542,413 @@ class SaveAPI(SystemAIRSocket):
 
         op_val = self.state[op_key]
         if op_val in self._custom_fan_map:
-            self.state[SENSOR_CUSTOM_FAN_MODE] = self.state[self._custom_fan_map[op_val]]
-            self.state[SENSOR_CUSTOM_OPERATION] = SA_OPERATION_MODE_AUTO
+            self._update(SENSOR_CUSTOM_FAN_MODE, self.state.get(self._custom_fan_map[op_val]), changes)
+            self._update(SENSOR_CUSTOM_OPERATION, SA_OPERATION_MODE_AUTO, changes)
         elif SA_OPERATION_MODE_OFF:
-            self.state[SENSOR_CUSTOM_FAN_MODE] = SA_FAN_MODE_OFF
-            self.state[SENSOR_CUSTOM_OPERATION] = SA_OPERATION_MODE_OFF
+            self._update(SENSOR_CUSTOM_FAN_MODE, SA_FAN_MODE_OFF, changes)
+            self._update(SENSOR_CUSTOM_OPERATION, SA_OPERATION_MODE_OFF, changes)
 
-    async def _postprocess_and_update(self, data):
+    @staticmethod
+    def _decode(data):
+        decoded = {}
         for k, v in data.items():
-            if k in POSTPROCESS_MAP:
-                v = POSTPROCESS_MAP[k](v)
-            self.state[k] = v
+            decoder = POSTPROCESS_MAP.get(k)
+            decoded[k] = v if decoder is None else decoder(v)
+        return decoded
+
+    def _apply(self, values, received=False):
+        """
+        Apply decoded values to the state and notify change listeners of the keys that actually moved.
+        :param received: values were sent by the device, so restored values of the same keys are no longer stale
+        """
+        changes = {}
+        for k, v in values.items():
+            self._update(k, v, changes)
+
+        self._ha_postprocess(changes)
+        if self.derived is not None:
+            for k, v in self.derived.update(self.state, changes).items():
+                self._update(k, v, changes)
+
+        if received and self._stale:
+            self._refresh_stale(values, changes)
+
+        if changes:
+            self._listener_on_change.dispatch_changes(changes)
+        return changes
+
+    async def _postprocess_and_update(self, data):
+        values = self._decode(data)
+        if self.history is not None:
+            self.history.record(values)
+        return self._apply(values, received=True)
+
+    def _decode_written(self, values):
+        """Return written values decoded under the sensors that confirm them, None when they cannot be decoded."""
+        try:
+            return self._decode({
+                WRITE_CONFIRM_MAP.get(k, k): v for k, v in values.items()
+                if WRITE_CONFIRM_MAP.get(k, k) in self.available_sensors
+            })
+        except (KeyError, ValueError, TypeError):
+            _LOGGER.debug("Cannot decode written values %s, skipping optimistic update", values)
+            return None
+
+    def _apply_optimistic(self, data, confirmation):
+        """Show decoded written values right away and keep them pending until the device confirms them."""
+        for k in data:
+            previous = self._optimistic[k][0] if k in self._optimistic else self.state.get(k)
+            self._optimistic[k] = (previous, confirmation)
+
+        self._apply(data)
+        confirmation.add_done_callback(self._rollback)
+
+    def _rollback(self, confirmation):
+        """Restore the previous values of a write the device did not confirm."""
+        if not confirmation.cancelled() and confirmation.exception() is None:
+            return
+
+        restore = {k: previous for k, (previous, owner) in self._optimistic.items() if owner is confirmation}
+        if not restore:
+            return
+
+        _LOGGER.warning("Write of %s was not confirmed, rolling back", ", ".join(restore))
+        for k in restore:
+            del self._optimistic[k]
+        self._apply(restore)
+
+    @property
+    def pending_keys(self):
+        """Keys showing a written value that the device has not confirmed yet."""
+        return frozenset(self._optimistic)
+
+    @property
+    def iam_id(self):
+        return self._iam_id
 
-        await self._ha_postprocess()
+    @property
+    def seconds_since_update(self):
+        """Seconds since the last READ or VALUE_CHANGED frame, None before the first one."""
+        if self._last_update is None:
+            return None
+        return time.monotonic() - self._last_update
+
+    def diagnostics(self):
+        diagnostics = super().diagnostics()
+        diagnostics.update({
+            "sync_mode": self._sync_mode,
+            "subscribed_sensors": len(self.subscribed_sensors),
+            "seconds_since_update": self.seconds_since_update,
+            "pending_writes": len(self._optimistic),
+            "state_version": self.state.version,
+            "stale_sensors": len(self._stale),
+        })
+        return diagnostics
+
+    @property
+    def authenticated(self):
+        """True while the current connection is logged in."""
+        return self._e_auth_ok.is_set()
+
+    @property
+    def stale(self):
+        """True while the state holds values restored from a snapshot that the device has not sent since."""
+        return bool(self._stale)
+
+    @property
+    def stale_keys(self):
+        """Keys still showing values restored from a snapshot."""
+        return frozenset(self._stale)
+
+    def export_snapshot(self):
+        """Return the known values with the wall-clock time they were received, as a JSON-serializable dict."""
+        offset = time.time() - time.monotonic()
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "values": {k: [v, round(self.state.timestamp(k) + offset, 1)] for k, v in self.state.items()},
+        }
+        if self.derived is not None:
+            snapshot["energy"] = self.derived.energy
+        return snapshot
+
+    def restore_snapshot(self, snapshot):
+        """
+        Fill the state from the output of export_snapshot, without overwriting values received since.
+        Restored values are marked stale until the device sends them, or the values they are computed from.
+        :return: True when the snapshot was restored
+        """
+        if not snapshot or snapshot.get("version") != SNAPSHOT_VERSION:
+            return False
+
+        offset = time.time() - time.monotonic()
+        changes = {}
+        for k, (v, received) in snapshot.get("values", {}).items():
+            if k in self.state:
+                continue
+            try:
+                self.state.set(k, v, received - offset)
+            except KeyError:
+                continue
+            changes[k] = (None, v)
+
+        if self.derived is not None and "energy" in snapshot:
+            self.derived.energy = snapshot["energy"]
+
+        self._stale = set(changes)
+        if changes:
+            self._listener_on_change.dispatch_changes(changes)
+        return True
+
+    def _refresh_stale(self, values, changes):
+        """
+        Clear staleness of the keys in values, and of computed keys whose inputs are no longer stale.
+        Refreshed keys that kept their restored value are added to changes, so listeners learn they are current.
+        """
+        fresh = self._stale.intersection(values)
+        self._stale -= fresh
+        for k in self._stale.intersection(DEPENDENCIES):
+            if self._stale.isdisjoint(DEPENDENCIES[k]):
+                fresh.add(k)
+        self._stale -= fresh
+
+        for k in fresh:
+            if k not in changes and k in self.state:
+                changes[k] = (self.state[k], self.state[k])
 
     async def on_message(self, data):
         try:
-            self.state["type"] = data["type"]
+            self.info["type"] = data["type"]
         except Exception:
             pass
 
         if data["type"] == "LOGGED_IN":
             _LOGGER.debug("Client connected and authenticated")
-            await self._postprocess_and_update({
-                "machineID": data["loggedinToMachineId"]
-            })
-
+            self.info["machineID"] = data["loggedinToMachineId"]
             return
 
         elif data["type"] == "READ" and "readValues" in data:
             _LOGGER.debug("readValues: %s", data)
             values = data["readValues"]
+            self._last_update = time.monotonic()
+            self._e_updated.set()
+            if self._snapshot_keys is not None:
+                self._reread.update(self._snapshot_keys.difference(values))
+                self._snapshot_keys = None
+                if self._reread:
+                    self._wake()
+            if self._optimistic:
+                values = {k: v for k, v in values.items() if k not in self._optimistic}
             await self._postprocess_and_update(values)
 
         elif data["type"] == "VALUE_CHANGED" and "changedValues" in data:
             _LOGGER.debug("changedValues: %s", data)
             values = data["changedValues"]
+            self._last_update = time.monotonic()
+            self._e_updated.set()
+            for k in values:
+                self._optimistic.pop(k, None)
             await self._postprocess_and_update(values)
 
         elif data["type"] == "ERROR":
-            _LOGGER.error(data)
             await self.on_error(data)
         else:
-            _LOGGER.warning("The read commend is not implemented correctly: %s", data)
+            _LOG_LIMITED.warning(data["type"], "The read commend is not implemented correctly: %s", data)
 
     async def on_error(self, err):
-        _LOGGER.error(err)
-        self.state["type"] = "ERROR"
-        self.state["errorTypeId"] = err["errorTypeId"]
+        if not isinstance(err, dict):
+            _LOGGER.error("Connection error: %s", err)
+            return
+
+        _LOG_LIMITED.error(err.get("errorTypeId"), "Savecair returned an error: %s", err)
+
+        self.info["type"] = "ERROR"
+        self.info["errorTypeId"] = err["errorTypeId"]
 
     async def on_close(self):
         self._e_auth_ok.clear()
+        self._e_updated.clear()
+        if self.derived is not None:
+            self.derived.pause()
+        self.resync()
 
     async def on_open(self):
-        pass
-
-    async def login(self, iam_id=None, password=None):
-        """Send login string."""
+        if self._logged_in:
+            self._spawn(self._relogin())
+
+    async def _relogin(self):
+        """
+        Log in again after a reconnect. The poll loop re-reads the subscribed sensors afterwards.
+        Rejected credentials are handed to the error listeners, which decide whether to stop reconnecting.
+        Any other failure closes the connection, so the supervisor reconnects and logs in again with backoff.
+        """
+        try:
+            await self.login()
+        except (InvalidIAMError, InvalidPasswordError) as e:
+            _LOGGER.error("Savecair rejected the credentials after reconnecting: %s", e)
+            self._listener_on_error.dispatch(e)
+        except Exception as e:  # pylint: disable=broad-except
+            _LOGGER.error("Could not log in after reconnecting, will reconnect: %s", str(e) or type(e).__name__)
+            if self.ctx is not None:
+                await self.ctx.close()
+
+    async def login(self, iam_id=None, password=None, timeout=30):
+        """Send login string. Returns info, which holds the machineID of the unit once logged in."""
         iam_id = iam_id if iam_id else self._iam_id
         password = password if password else self._password
+        self._iam_id, self._password = iam_id, password
 
-        self._e_wait_message.clear()
-        await self.send(login(iam_id, password))
-
-        await self._e_wait_message.wait()
-
-        # Error occured during authentication
-        if self.state["type"] == "ERROR":
-
-            if self.state["errorTypeId"] == "WRONG_PASSWORD":
-                raise InvalidPasswordError("Incorrect password")
-            elif self.state["errorTypeId"] == "ACCESS_DENIED_SEVERE":
-                raise InvalidIAMError("Incorrect IAM")
-            elif self.state["errorTypeId"] == "UNIT_NOT_CONNECTED":
-                raise InvalidDeviceError("Incorrect device")
-            raise UnknownError("An error occured during login.")
+        try:
+            await self.request(login(iam_id, password), REQUEST_LOGIN, timeout=timeout)
+        except ResponseError as e:
+            raise login_error(e.error_type)
 
+        self._logged_in = True
         self._e_auth_ok.set()
-        return self.state  # {"title": data["loggedinToMachineId"]} if is_logged_in else False
+        return self.info
+
+    async def queue_write(self, **values):
+        """
+        Queue values for the next WRITE frame and wait until it is sent. The last write to a key wins.
+        :return: A future that resolves once VALUE_CHANGED has confirmed the written values
+        """
+        self._pending_writes.update(values)
+        if self._write_future is None:
+            self._write_future = asyncio.get_event_loop().create_future()
+            self._spawn(self._flush_writes(self._write_future))
+
+        # Every batched caller waits on the same future, cancelling one caller must not cancel it for the others
+        return await asyncio.shield(self._write_future)
+
+    async def _flush_writes(self, future):
+        try:
+            await asyncio.sleep(self._write_delay)
+            values, self._pending_writes = self._pending_writes, {}
+            self._write_future = None
+
+            # The device only reports changes, a key written with its current value is never confirmed
+            data = self._decode_written(values)
+            if data is None:
+                keys = {WRITE_CONFIRM_MAP.get(k, k) for k in values} & self.available_sensors
+            else:
+                data = {k: v for k, v in data.items() if k not in self.state or self.state[k] != v}
+                keys = set(data)
+
+            if keys:
+                confirmation = self._tracker.expect(REQUEST_WRITE, keys, self._write_timeout)
+            else:
+                confirmation = asyncio.get_event_loop().create_future()
+                confirmation.set_result({})
+
+            if await self.send(write(**values), REQUEST_WRITE) is False:
+                self._tracker.discard(confirmation)
+                raise ConnectionError("Not connected to the savecair endpoint")
+            if data:
+                self._apply_optimistic(data, confirmation)
+            if not future.done():
+                future.set_result(confirmation)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:  # pylint: disable=broad-except
+            if not future.done():
+                future.set_exception(e)
+        finally:
+            if self._write_future is future:
+                self._pending_writes = {}
+                self._write_future = None
 
     async def set_temperature(self, value):
         """Set the temperature of the ventilation unit."""
-        await self.send(write(main_temperature_offset=int(value * 10)))
+        return await self.queue_write(main_temperature_offset=int(value * 10))
 
     async def set_manual_mode(self):
         """Set the ventilation unit in manual mode."""
-        await self.send(write(mode_change_request="1"))
+        return await self.queue_write(mode_change_request="1")
 
     async def set_crowded_mode(self):
         """Set the ventilation unit in crowded mode."""
-        await self.send(write(
+        return await self.queue_write(
             user_mode_crowded_duration=8,
             mode_change_request="2"
-        ))
+        )
 
     async def set_refresh_mode(self):
         """Set the ventilation unit in refresh mode."""
-        await self.send(write(
+        return await self.queue_write(
             user_mode_refresh_duration=240,
             mode_change_request="3"
-        ))
+        )
 
     async def set_fireplace_mode(self):
         """Set the ventilation unit in fireplace mode."""
-        await self.send(write(
+        return await self.queue_write(
             user_mode_fireplace_duration=60,
             mode_change_request="4"
-        ))
+        )
 
     async def set_holiday_mode(self):
         """Set the ventilation unit in holiday mode."""
-        await self.send(write(
+        return await self.queue_write(
             user_mode_holiday_duration=365,
             mode_change_request="6"
-        ))
+        )
 
     async def set_auto_mode(self):
         """Set the ventilation unit in auto mode."""
-        await self.send(write(mode_change_request="0"))
+        return await self.queue_write(mode_change_request="0")
 
     async def set_away_mode(self):
         """Set the ventilation unit in away mode."""
-        await self.send(write(
+        return await self.queue_write(
             user_mode_away_duration=72,
             mode_change_request="5"
-        ))
+        )
 
     async def set_fan_off(self):
         """Set the fan speed to off."""
-        await self.send(write(main_airflow="1"))
+        return await self.queue_write(main_airflow="1")
 
     async def set_fan_low(self):
         """Set the fan speed to low."""
-        await self.send(write(main_airflow="2"))
+        return await self.queue_write(main_airflow="2")
 
     async def set_fan_normal(self):
         """Set the fan speed to normal."""
-        await self.send(write(main_airflow="3"))
+        return await self.queue_write(main_airflow="3")
 
     async def set_fan_high(self):
         """Set the fan speed to high."""
-        await self.send(write(main_airflow="4"))
+        return await self.queue_write(main_airflow="4")
 
     async def set_operation_mode(self, opmode):
         if opmode not in self._opmode:
             raise SaveAPI.OpmodeDoesNotExistsError("The opmode %s does not exists" % opmode)
 
-        await self._opmode[opmode]()
+        return await self._opmode[opmode]()
 
     async def set_fan_mode(self, fan_mode):
         if fan_mode not in self._fan_mode:
             raise SaveAPI.FanmodeDoesNotExistsError("The fanmode %s does not exists" % fan_mode)
 
-        await self._fan_mode[fan_mode]()
+        return await self._fan_mode[fan_mode]()
 
     async def set(self, k, value):
+        """Write a value. Returns a future that resolves when the device has confirmed it."""
         if k == SENSOR_TARGET_TEMPERATURE:
-            await self.set_temperature(value)
+            return await self.set_temperature(value)
         elif k == SENSOR_MODE_CHANGE_REQUEST:
-            await self.set_operation_mode(value)
+            return await self.set_operation_mode(value)
         elif k == SENSOR_CURRENT_FAN_MODE:
-            await self.set_fan_mode(value)
+            return await self.set_fan_mode(value)
         elif k == SENSOR_CUSTOM_OPERATION:
 
             if value == SA_OPERATION_MODE_OFF:
-                await self.set_manual_mode()
-                await self.set_fan_off()
+                confirmations = await asyncio.gather(self.set_manual_mode(), self.set_fan_off())
+                confirmation = asyncio.gather(*set(confirmations))
+                confirmation.add_done_callback(_retrieve)
+                return confirmation
             elif value == SA_OPERATION_MODE_AUTO:
-                await self.set_auto_mode()
+                return await self.set_auto_mode()
 
     def get_current_operation(self):
         if SENSOR_CURRENT_OPERATION not in self.state:
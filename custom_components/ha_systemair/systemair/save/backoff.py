@@ -0,0 +1,54 @@
+"""Reconnect backoff for the SaveCair websocket."""
+import random
+import time
+
+
+class Backoff:
+    """Exponential backoff with full jitter and a fast first retry."""
+
+    def __init__(self, first=1.0, initial=5.0, maximum=300.0, factor=2.0):
+        """
+        :param first: Upper bound for the first retry delay
+        :param initial: Upper bound for the second retry delay
+        :param maximum: Upper bound for any retry delay
+        :param factor: Growth of the upper bound per attempt
+        """
+        self._first = first
+        self._initial = initial
+        self._maximum = maximum
+        self._factor = factor
+        self.attempt = 0
+
+    def next(self):
+        """Return the delay before the next attempt."""
+        if self.attempt == 0:
+            ceiling = self._first
+        else:
+            ceiling = min(self._maximum, self._initial * self._factor ** (self.attempt - 1))
+        self.attempt += 1
+        return random.uniform(0, ceiling)
+
+    def reset(self):
+        self.attempt = 0
+
+
+class TokenBucket:
+    """Rate limit shared by many callers: up to burst at once, then one every 1/rate seconds."""
+
+    def __init__(self, rate=0.5, burst=5):
+        """
+        :param rate: Tokens added per second
+        :param burst: Tokens available at once
+        """
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def delay(self):
+        """Take a token and return the seconds to wait before using it. Waiting callers queue up in order."""
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+        self._tokens -= 1
+        return max(-self._tokens / self._rate, 0.0)
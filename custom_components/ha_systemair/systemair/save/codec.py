@@ -0,0 +1,25 @@
+"""JSON encoding of SaveCair frames. Uses orjson when it is installed and the standard library otherwise."""
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+if orjson is not None:
+    BACKEND = "orjson"
+
+    def dumps(obj):
+        """Serialize obj to a str, websocket text frames must not be bytes."""
+        return orjson.dumps(obj).decode()
+
+    loads = orjson.loads
+else:
+    BACKEND = "json"
+
+    def dumps(obj):
+        """Serialize obj to a str."""
+        return json.dumps(obj, separators=(",", ":"))
+
+    loads = json.loads
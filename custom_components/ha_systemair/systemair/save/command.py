@@ -1,7 +1,9 @@
 """SystemAIR API commands."""
 import random
 import time
-from json import dumps
+from functools import lru_cache
+
+from .codec import dumps
 
 
 def login(iam_id, password):
@@ -22,12 +24,18 @@ def login(iam_id, password):
 def read(items):
     """
     Request read of items for the ventilation unit.
-    :param items: List
+    The frame is cached per sequence of items, so polling a fixed set of sensors serializes it only once.
+    :param items: Iterable
     :return:
     """
+    return _read(tuple(items))
+
+
+@lru_cache(maxsize=64)
+def _read(items):
     return dumps(dict(
         type="READ",
-        idsToRead=items
+        idsToRead=list(items)
     ))
 
 
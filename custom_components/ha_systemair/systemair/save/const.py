@@ -6,6 +6,13 @@ RECV_TYPE_LOGGED_IN = "LOGGED_IN"
 RECV_TYPE_READ = "READ"
 RECV_TYPE_VALUE_CHANGED = "VALUE_CHANGED"
 
+REQUEST_LOGIN = "LOGIN"
+REQUEST_READ = "READ"
+REQUEST_WRITE = "WRITE"
+
+SYNC_MODE_POLL = "poll"  # Read every subscribed sensor each poll_interval
+SYNC_MODE_PUSH = "push"  # Read once after login, then rely on VALUE_CHANGED
+
 
 SA_FAN_MODE_OFF = "off"
 SA_FAN_MODE_LOW = "low"
@@ -57,6 +64,11 @@ POSTPROCESS_ALARM = lambda x: ALARM_MODES[str(x)]
 SENSOR_CUSTOM_OPERATION: str = "custom_operation"
 SENSOR_CUSTOM_FAN_MODE = 'custom_fan_mode'
 
+# Derived, computed locally from device values
+SENSOR_HEAT_RECOVERY_EFFICIENCY = "heat_recovery_efficiency"
+SENSOR_HEAT_RECOVERY_POWER = "heat_recovery_power"
+SENSOR_HEAT_RECOVERY_ENERGY = "heat_recovery_energy"
+
 # TODO -- Other useless
 """
 main_iaq  # Main (Primary)  indoor air quality - Example: economic
@@ -75,8 +87,8 @@ week_schedule_lock
 fan_log_request_reset
 """
 
-SENSOR_FAN_SPEED_EXTRACT = 'digital_input_tacho_saf_value'
-SENSOR_FAN_SPEED_SUPPLY = 'digital_input_tacho_eaf_value'
+SENSOR_FAN_SPEED_EXTRACT = 'digital_input_tacho_eaf_value'  # Extract air fan
+SENSOR_FAN_SPEED_SUPPLY = 'digital_input_tacho_saf_value'  # Supply air fan
 
 SENSOR_TEMPERATURE_OUTDOOR = 'outdoor_air_temp'
 SENSOR_TEMPERATURE_SUPPLY = 'supply_air_temp'
@@ -161,56 +173,100 @@ SENSOR_ALARM_INCORRECT_MANUAL_MODE = 'alarm_manual_mode_state'  # ONE OR MORE OF
 SENSOR_TARGET_TEMPERATURE = "main_temperature_offset"
 SENSOR_MODE_CHANGE_REQUEST = 'mode_change_request'
 
-# Postprocessing
-POSTPROCESS_MAP = {
-    SENSOR_CURRENT_FAN_MODE: POSTPROCESS_FAN_MODE,
-    SENSOR_TEMPERATURE_OUTDOOR: POSTPROCESS_TEMPERATURE,
-    SENSOR_TEMPERATURE_SUPPLY: POSTPROCESS_TEMPERATURE,
-    SENSOR_TEMPERATURE_EXTRACT: POSTPROCESS_TEMPERATURE,
-    SENSOR_FILTER_TIME: POSTPROCESS_DAYS_UNTIL,
-    SENSOR_CURRENT_OPERATION: POSTPROCESS_OPERATION,
-    SENSOR_CROWDED_SUPPLY: POSTPROCESS_FAN_MODE,
-    SENSOR_FIREPLACE_SUPPLY: POSTPROCESS_FAN_MODE,
-    SENSOR_REFRESH_SUPPLY: POSTPROCESS_FAN_MODE,
-    SENSOR_HOLIDAY_SUPPLY: POSTPROCESS_FAN_MODE,
-    SENSOR_AUTO_SUPPLY: POSTPROCESS_FAN_MODE,
-    SENSOR_AWAY_SUPPLY: POSTPROCESS_FAN_MODE,
-    SENSOR_TARGET_TEMPERATURE: POSTPROCESS_TEMPERATURE,
-
-
-
-
-    SENSOR_ALARM_FROST_PROTECTION: POSTPROCESS_ALARM,
-    SENSOR_ALARM_FROST_PROTECTION_SENSOR: POSTPROCESS_ALARM,
-    SENSOR_ALARM_DEFROST: POSTPROCESS_ALARM,
-    SENSOR_ALARM_SUPPLY_RPM: POSTPROCESS_ALARM,
-    SENSOR_ALARM_EXTRACT_RPM: POSTPROCESS_ALARM,
-    SENSOR_ALARM_SUPPLY_FLOW_PRESSURE: POSTPROCESS_ALARM,
-    SENSOR_ALARM_EXTRACT_FLOW_PRESSURE: POSTPROCESS_ALARM,
-    SENSOR_ALARM_ELECTRICAL_HEATER: POSTPROCESS_ALARM,
-    SENSOR_ALARM_BYPASS_DAMPER: POSTPROCESS_ALARM,
-    SENSOR_ALARM_ROTARY_EXCHANGER: POSTPROCESS_ALARM,
-    SENSOR_ALARM_BYPASS_DAMPER_2: POSTPROCESS_ALARM,
-    SENSOR_ALARM_OUTDOOR_TEMP_SENSOR: POSTPROCESS_ALARM,
-    SENSOR_ALARM_REHEATER_TEMP_SENSOR: POSTPROCESS_ALARM,
-    SENSOR_ALARM_SUPPLY_TEMP_SENSOR: POSTPROCESS_ALARM,
-    SENSOR_ALARM_INDOOR_TEMP_SENSOR: POSTPROCESS_ALARM,
-    SENSOR_ALARM_EXTRACT_TEMP_SENSOR: POSTPROCESS_ALARM,
-    SENSOR_ALARM_PREHEATER_TEMP_SENSOR: POSTPROCESS_ALARM,
-    SENSOR_ALARM_EFFICIENCY_TEMP_SENSOR: POSTPROCESS_ALARM,
-    SENSOR_ALARM_PDM_RH: POSTPROCESS_ALARM,
-    SENSOR_ALARM_PDM_TEMP: POSTPROCESS_ALARM,
-    SENSOR_ALARM_CHANGE_FILTER: POSTPROCESS_ALARM,
-    SENSOR_ALARM_EXTRA_CONTROLLER: POSTPROCESS_ALARM,
-    SENSOR_ALARM_EXTERNAL_STOP: POSTPROCESS_ALARM,
-    SENSOR_ALARM_MANUAL_STOP: POSTPROCESS_ALARM,
-    SENSOR_ALARM_REHEATER_OVERHEAT: POSTPROCESS_ALARM,
-    SENSOR_ALARM_SUPPLY_TEMP_LOW: POSTPROCESS_ALARM,
-    SENSOR_ALARM_CO2: POSTPROCESS_ALARM,
-    SENSOR_ALARM_RH: POSTPROCESS_ALARM,
-    SENSOR_ALARM_INCORRECT_MANUAL_MODE: POSTPROCESS_ALARM
-
+# Written keys that are reported back under another key
+WRITE_CONFIRM_MAP = {
+    SENSOR_MODE_CHANGE_REQUEST: SENSOR_CURRENT_OPERATION,
+}
 
+# Sensor groups
+SENSORS_TEMPERATURE = (
+    SENSOR_TEMPERATURE_OUTDOOR,
+    SENSOR_TEMPERATURE_SUPPLY,
+    SENSOR_TEMPERATURE_EXTRACT,
+)
+
+SENSORS_FAN_SPEED = (
+    SENSOR_FAN_SPEED_EXTRACT,
+    SENSOR_FAN_SPEED_SUPPLY,
+)
+
+SENSORS_USER_MODE = (
+    SENSOR_CROWDED_SUPPLY,
+    SENSOR_REFRESH_SUPPLY,
+    SENSOR_AWAY_SUPPLY,
+    SENSOR_HOLIDAY_SUPPLY,
+    SENSOR_FIREPLACE_SUPPLY,
+    SENSOR_AUTO_SUPPLY,
+    SENSOR_CROWDED_EXTRACT,
+    SENSOR_REFRESH_EXTRACT,
+    SENSOR_AWAY_EXTRACT,
+    SENSOR_HOLIDAY_EXTRACT,
+    SENSOR_FIREPLACE_EXTRACT,
+    SENSOR_AUTO_EXTRACT,
+)
+
+SENSORS_FUNCTION = (
+    SENSOR_FUNCTION_COOLING,
+    SENSOR_FUNCTION_VACUUM_CLEANER,
+    SENSOR_FUNCTION_FREE_COOLING,
+    SENSOR_FUNCTION_HEATING,
+    SENSOR_FUNCTION_DEFROSTING,
+    SENSOR_FUNCTION_HEAT_RECOVERY,
+    SENSOR_FUNCTION_COOLING_RECOVERY,
+    SENSOR_FUNCTION_MOISTURE_TRANSFER,
+    SENSOR_FUNCTION_SECONDARY_AIR,
+    SENSOR_FUNCTION_COOKER_HOOD,
+    SENSOR_FUNCTION_HEATER_COOLDOWN,
+    SENSOR_FUNCTION_SERVICE_USER_LOCK,
+)
+
+SENSORS_ALARM = (
+    SENSOR_ALARM_FROST_PROTECTION,
+    SENSOR_ALARM_FROST_PROTECTION_SENSOR,
+    SENSOR_ALARM_DEFROST,
+    SENSOR_ALARM_SUPPLY_RPM,
+    SENSOR_ALARM_EXTRACT_RPM,
+    SENSOR_ALARM_SUPPLY_FLOW_PRESSURE,
+    SENSOR_ALARM_EXTRACT_FLOW_PRESSURE,
+    SENSOR_ALARM_ELECTRICAL_HEATER,
+    SENSOR_ALARM_BYPASS_DAMPER,
+    SENSOR_ALARM_ROTARY_EXCHANGER,
+    SENSOR_ALARM_BYPASS_DAMPER_2,
+    SENSOR_ALARM_OUTDOOR_TEMP_SENSOR,
+    SENSOR_ALARM_REHEATER_TEMP_SENSOR,
+    SENSOR_ALARM_SUPPLY_TEMP_SENSOR,
+    SENSOR_ALARM_INDOOR_TEMP_SENSOR,
+    SENSOR_ALARM_EXTRACT_TEMP_SENSOR,
+    SENSOR_ALARM_PREHEATER_TEMP_SENSOR,
+    SENSOR_ALARM_EFFICIENCY_TEMP_SENSOR,
+    SENSOR_ALARM_PDM_RH,
+    SENSOR_ALARM_PDM_TEMP,
+    SENSOR_ALARM_CHANGE_FILTER,
+    SENSOR_ALARM_EXTRA_CONTROLLER,
+    SENSOR_ALARM_EXTERNAL_STOP,
+    SENSOR_ALARM_MANUAL_STOP,
+    SENSOR_ALARM_REHEATER_OVERHEAT,
+    SENSOR_ALARM_SUPPLY_TEMP_LOW,
+    SENSOR_ALARM_CO2,
+    SENSOR_ALARM_RH,
+    SENSOR_ALARM_INCORRECT_MANUAL_MODE,
+)
+
+# Poll tiers, in seconds. Sensors not listed are read every poll_interval.
+POLL_PERIOD_FAST = 15
+POLL_PERIOD_NORMAL = 60
+POLL_PERIOD_SLOW = 300
+POLL_PERIOD_RARE = 3600
+
+POLL_TIERS = {
+    POLL_PERIOD_FAST: (SENSOR_CURRENT_HUMIDITY,) + SENSORS_FAN_SPEED,
+    POLL_PERIOD_NORMAL: SENSORS_TEMPERATURE + SENSORS_FUNCTION + (
+        SENSOR_CURRENT_FAN_MODE,
+        SENSOR_CURRENT_OPERATION,
+        SENSOR_TARGET_TEMPERATURE,
+    ),
+    POLL_PERIOD_SLOW: SENSORS_ALARM + (SENSOR_USER_LOCK,),
+    POLL_PERIOD_RARE: SENSORS_USER_MODE + (SENSOR_FILTER_TIME,),
 }
 
 """
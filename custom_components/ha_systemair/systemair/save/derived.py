@@ -0,0 +1,75 @@
+"""Heat-recovery metrics derived from device values, recomputed only when one of their inputs changes."""
+import time
+
+from .const import (
+    SENSOR_FAN_SPEED_SUPPLY,
+    SENSOR_HEAT_RECOVERY_EFFICIENCY,
+    SENSOR_HEAT_RECOVERY_ENERGY,
+    SENSOR_HEAT_RECOVERY_POWER,
+    SENSOR_TEMPERATURE_EXTRACT,
+    SENSOR_TEMPERATURE_OUTDOOR,
+    SENSOR_TEMPERATURE_SUPPLY,
+)
+from .registry import HEAT_RECOVERY_INPUTS
+
+# W per m3/h of air and K, from a density of 1.2 kg/m3 and a heat capacity of 1005 J/(kg K)
+AIR_HEAT_CAPACITY = 1.2 * 1005 / 3600
+
+# Below this difference between extract and outdoor air the efficiency is not meaningful
+MIN_TEMPERATURE_SPREAD = 1.0
+
+INPUTS = frozenset(HEAT_RECOVERY_INPUTS)
+
+
+class DerivedMetrics:
+    """
+    Temperature efficiency of the heat exchanger, recovered power and recovered energy of one unit.
+    Supply airflow is not reported by the device, it is estimated from the supply fan speed as
+    nominal_airflow at nominal_rpm. Power includes any reheater contribution to the supply air temperature and is
+    negative while the supply air is cooler than outdoors. Energy only counts heat gained, so it never decreases.
+    """
+
+    def __init__(self, nominal_airflow=250.0, nominal_rpm=3000.0, energy=0.0):
+        """
+        :param nominal_airflow: Supply airflow in m3/h at nominal_rpm
+        :param nominal_rpm: Supply fan speed that gives nominal_airflow
+        :param energy: Recovered energy in kWh to continue counting from
+        """
+        self._airflow_per_rpm = nominal_airflow / nominal_rpm
+        self.energy = energy
+        self._power = None
+        self._since = None
+
+    def pause(self):
+        """Stop integrating energy until the next update, so time without data is not counted at the last power."""
+        self._power = self._since = None
+
+    def update(self, state, changes, now=None):
+        """Return the derived values to store when changes touched an input, an empty dict otherwise."""
+        if INPUTS.isdisjoint(changes):
+            return {}
+
+        now = time.monotonic() if now is None else now
+        outdoor = state.get(SENSOR_TEMPERATURE_OUTDOOR)
+        supply = state.get(SENSOR_TEMPERATURE_SUPPLY)
+        extract = state.get(SENSOR_TEMPERATURE_EXTRACT)
+        rpm = state.get(SENSOR_FAN_SPEED_SUPPLY)
+
+        if self._power is not None:
+            self.energy += max(self._power, 0) * (now - self._since) / 3600 / 1000
+
+        efficiency = power = None
+        if outdoor is not None and supply is not None:
+            if extract is not None and abs(extract - outdoor) >= MIN_TEMPERATURE_SPREAD:
+                efficiency = round((supply - outdoor) / (extract - outdoor) * 100, 1)
+                if not 0 <= efficiency <= 100:
+                    efficiency = None
+            if rpm is not None:
+                power = AIR_HEAT_CAPACITY * rpm * self._airflow_per_rpm * (supply - outdoor)
+
+        self._power, self._since = power, now
+        return {
+            SENSOR_HEAT_RECOVERY_EFFICIENCY: efficiency,
+            SENSOR_HEAT_RECOVERY_POWER: round(power) if power is not None else None,
+            SENSOR_HEAT_RECOVERY_ENERGY: round(self.energy, 3),
+        }
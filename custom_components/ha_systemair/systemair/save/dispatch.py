@@ -0,0 +1,134 @@
+"""Listener fan-out for the SaveCair websocket."""
+import asyncio
+import logging
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class Listener:
+    """A registered coroutine fed through its own bounded queue."""
+
+    def __init__(self, coro, maxsize, keys=None):
+        self.coro = coro
+        self.keys = frozenset(keys) if keys is not None else None
+        self.name = getattr(coro, "__qualname__", repr(coro))
+        self._queue = asyncio.Queue(maxsize)
+        self._task = None
+        self._last = None
+
+        self.calls = 0
+        self.errors = 0
+        self.dropped = 0
+        self.merged = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def put(self, args, merge=False):
+        """
+        Queue a call. When the listener falls behind the oldest pending call is dropped, or with merge, the
+        {key: (old, new)} diff in args is merged into the newest pending call so no changed key is lost.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_event_loop().create_task(self._run())
+
+        if self._queue.full():
+            if merge:
+                # A full queue still holds the newest call, the worker only takes the oldest
+                _merge(self._last[0], args[0])
+                self.merged += 1
+                return
+            self._queue.get_nowait()
+            self._queue.task_done()
+            self.dropped += 1
+        self._queue.put_nowait(args)
+        self._last = args
+
+    async def _run(self):
+        while True:
+            args = await self._queue.get()
+            start = time.perf_counter()
+            try:
+                await self.coro(*args)
+            except Exception:  # pylint: disable=broad-except
+                self.errors += 1
+                _LOGGER.exception("Listener %s failed", self.name)
+            finally:
+                self._queue.task_done()
+
+            elapsed = time.perf_counter() - start
+            self.calls += 1
+            self.total_time += elapsed
+            self.max_time = max(self.max_time, elapsed)
+
+    async def close(self, timeout=1.0):
+        """Give pending calls up to timeout seconds to finish, then stop the worker."""
+        if self._task is None:
+            return
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            _LOGGER.warning("Listener %s did not finish %d pending calls", self.name, self._queue.qsize())
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self):
+        return {
+            "listener": self.name,
+            "calls": self.calls,
+            "errors": self.errors,
+            "dropped": self.dropped,
+            "merged": self.merged,
+            "pending": self._queue.qsize(),
+            "mean_time": self.total_time / self.calls if self.calls else 0.0,
+            "max_time": self.max_time,
+        }
+
+
+class ListenerGroup:
+    """Run every listener concurrently so a slow or failing one cannot hold up the others."""
+
+    def __init__(self, maxsize=100):
+        self._maxsize = maxsize
+        self._listeners = []
+
+    def __len__(self):
+        return len(self._listeners)
+
+    def add(self, coro, keys=None):
+        listener = Listener(coro, self._maxsize, keys)
+        self._listeners.append(listener)
+        return listener
+
+    def dispatch(self, *args):
+        for listener in self._listeners:
+            listener.put(args)
+
+    def dispatch_changes(self, changes):
+        """Hand each listener only the changed keys it subscribed to. Diffs are merged, never dropped."""
+        for listener in self._listeners:
+            if listener.keys is None:
+                listener.put((dict(changes),), merge=True)
+                continue
+
+            subset = {k: v for k, v in changes.items() if k in listener.keys}
+            if subset:
+                listener.put((subset,), merge=True)
+
+    async def close(self):
+        await asyncio.gather(*[x.close() for x in self._listeners])
+
+    def stats(self):
+        return [x.stats() for x in self._listeners]
+
+
+def _merge(pending, changes):
+    """Fold a later diff into a pending one, keeping the first old value and the last new value of each key."""
+    for k, (old, new) in changes.items():
+        pending[k] = (pending[k][0], new) if k in pending else (old, new)
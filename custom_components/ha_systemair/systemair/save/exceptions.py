@@ -13,4 +13,12 @@ class UnknownError(Exception):
 
 
 class InvalidDeviceError(Exception):
-    pass
\ No newline at end of file
+    pass
+
+
+class ResponseError(Exception):
+    """The server answered a request with an ERROR frame."""
+
+    def __init__(self, error_type):
+        super().__init__(error_type)
+        self.error_type = error_type
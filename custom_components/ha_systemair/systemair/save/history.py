@@ -0,0 +1,171 @@
+"""Bounded in-memory history of numeric sensors, downsampled from raw samples to 1 and 15 minute aggregates."""
+import time
+from array import array
+
+from .registry import GROUP_FAN_SPEED, GROUP_HUMIDITY, GROUP_TEMPERATURE, sensors_in
+
+HISTORY_SENSORS = frozenset(sensors_in(GROUP_TEMPERATURE) + sensors_in(GROUP_HUMIDITY) + sensors_in(GROUP_FAN_SPEED))
+
+MINUTE = 60
+QUARTER = 15 * 60
+
+
+class _Ring:
+    """Fixed number of rows of floats in one array, the oldest row is overwritten when full."""
+
+    __slots__ = ("_data", "_width", "_capacity", "_start", "_len")
+
+    def __init__(self, capacity, width):
+        self._data = array("d", [0.0]) * (capacity * width)
+        self._width = width
+        self._capacity = capacity
+        self._start = 0
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    @property
+    def full(self):
+        return self._len == self._capacity
+
+    def append(self, row):
+        i = ((self._start + self._len) % self._capacity) * self._width
+        self._data[i:i + self._width] = array("d", row)
+        if self.full:
+            self._start = (self._start + 1) % self._capacity
+        else:
+            self._len += 1
+
+    def first(self):
+        i = self._start * self._width
+        return self._data[i:i + self._width]
+
+    def __iter__(self):
+        for n in range(self._len):
+            i = ((self._start + n) % self._capacity) * self._width
+            yield self._data[i:i + self._width]
+
+
+class Series:
+    """
+    History of one sensor. Every sample is kept raw and folded into the open 1 minute aggregate, every closed
+    minute into the open 15 minute aggregate. Aggregates are rows of (start, min, max, sum, count).
+    """
+
+    __slots__ = ("raw", "minutes", "quarters", "_minute", "_quarter", "last")
+
+    def __init__(self, raw_size=240, minute_size=60, quarter_size=96):
+        self.raw = _Ring(raw_size, 2)
+        self.minutes = _Ring(minute_size, 5)
+        self.quarters = _Ring(quarter_size, 5)
+        self._minute = None
+        self._quarter = None
+        self.last = None
+
+    def add(self, value, now):
+        self.raw.append((now, value))
+        self.last = (now, value)
+
+        start = now - now % MINUTE
+        if self._minute is not None and self._minute[0] != start:
+            self._close_minute()
+        self._minute = _fold(self._minute, start, value, value, value, 1)
+
+    def _close_minute(self):
+        start, low, high, total, count = self._minute
+        self.minutes.append(self._minute)
+        self._minute = None
+
+        quarter = start - start % QUARTER
+        if self._quarter is not None and self._quarter[0] != quarter:
+            self.quarters.append(self._quarter)
+            self._quarter = None
+        self._quarter = _fold(self._quarter, quarter, low, high, total, count)
+
+    def stats(self, seconds, now):
+        """
+        Return (min, max, mean, count) of the samples in the last seconds, at the finest resolution covering them.
+        Aggregates overlapping the start of the window count in full, windows beyond retention are truncated.
+        Without samples in the window the last known value is returned with a count of 0, None if there is none.
+        """
+        since = now - seconds
+        if not self.raw.full or self.raw.first()[0] <= since:
+            rows = [(t, v, v, v, 1) for t, v in self.raw if t >= since]
+        elif not self.minutes.full or self.minutes.first()[0] <= since:
+            rows = [x for x in self.minutes if x[0] + MINUTE > since]
+            if self._minute is not None:
+                rows.append(self._minute)
+        else:
+            rows = [x for x in self.quarters if x[0] + QUARTER > since]
+            rows += [x for x in (self._quarter, self._minute) if x is not None]
+
+        count = sum(x[4] for x in rows)
+        if not count:
+            if self.last is None:
+                return None
+            return self.last[1], self.last[1], self.last[1], 0
+
+        return min(x[1] for x in rows), max(x[2] for x in rows), sum(x[3] for x in rows) / count, int(count)
+
+
+class SensorHistory:
+    """History of every numeric sensor of one unit. Memory is capped by the ring sizes of each Series."""
+
+    def __init__(self, sensors=HISTORY_SENSORS, raw_size=240, minute_size=60, quarter_size=96):
+        """
+        :param sensors: Sensors to record, other keys are ignored
+        :param raw_size: Raw samples kept per sensor
+        :param minute_size: 1 minute aggregates kept per sensor
+        :param quarter_size: 15 minute aggregates kept per sensor
+        """
+        self._sensors = frozenset(sensors)
+        self._sizes = (raw_size, minute_size, quarter_size)
+        self._series = {}
+
+    def __contains__(self, sensor):
+        return sensor in self._series
+
+    def record(self, values, now=None):
+        """Record the numeric values of tracked sensors in a dict of decoded values."""
+        now = time.time() if now is None else now
+        for k, v in values.items():
+            if k not in self._sensors or isinstance(v, bool) or not isinstance(v, (int, float)):
+                continue
+
+            series = self._series.get(k)
+            if series is None:
+                series = self._series[k] = Series(*self._sizes)
+            series.add(v, now)
+
+    def series(self, sensor):
+        return self._series.get(sensor)
+
+    def stats(self, sensor, seconds, now=None):
+        """Return (min, max, mean, count) of sensor over the last seconds, None if it was never recorded."""
+        series = self._series.get(sensor)
+        if series is None:
+            return None
+        return series.stats(seconds, time.time() if now is None else now)
+
+    def minimum(self, sensor, seconds):
+        stats = self.stats(sensor, seconds)
+        return stats[0] if stats else None
+
+    def maximum(self, sensor, seconds):
+        stats = self.stats(sensor, seconds)
+        return stats[1] if stats else None
+
+    def mean(self, sensor, seconds):
+        stats = self.stats(sensor, seconds)
+        return stats[2] if stats else None
+
+
+def _fold(aggregate, start, low, high, total, count):
+    if aggregate is None:
+        return [start, low, high, total, count]
+    aggregate[1] = min(aggregate[1], low)
+    aggregate[2] = max(aggregate[2], high)
+    aggregate[3] += total
+    aggregate[4] += count
+    return aggregate
@@ -0,0 +1,124 @@
+"""Manage many SaveCair units from one scheduler task."""
+import asyncio
+import logging
+import time
+
+from .api import SaveAPI
+from .backoff import TokenBucket
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SaveHub:
+    """
+    Run the sync steps of many SaveAPI units from a single task.
+    Units are given staggered phases so their reads do not fire in the same second, consecutive sends are spaced
+    out so outbound bursts stay flat. Every unit backs off on its own, but all reconnects share one rate limit.
+    """
+
+    def __init__(self, stagger=10.0, spacing=0.05, reconnect_limit=None):
+        """
+        :param stagger: Window in seconds over which the first sync of newly ready units is spread
+        :param spacing: Minimum seconds between sync steps of two units
+        :param reconnect_limit: TokenBucket shared by every unit's reconnect supervisor
+        """
+        self._stagger = stagger
+        self._spacing = spacing
+        self.reconnect_limit = reconnect_limit if reconnect_limit else TokenBucket()
+
+        self.units = {}
+        self._due = {}
+        self._e_wakeup = asyncio.Event()
+        self._task = None
+        self.steps = 0
+
+    def add_unit(self, iam_id, password, **kwargs):
+        """Create a SaveAPI for a unit driven by this hub."""
+        if iam_id in self.units:
+            return self.units[iam_id]
+
+        api = SaveAPI(iam_id=iam_id, password=password, hub=self, reconnect_limit=self.reconnect_limit, **kwargs)
+        self.units[iam_id] = api
+        return api
+
+    async def remove_unit(self, iam_id):
+        api = self.units.pop(iam_id, None)
+        if api is None:
+            return
+
+        self._due.pop(api, None)
+        await api.close()
+
+        if not self.units:
+            await self.close()
+
+    def schedule(self, api, delay=0.0, stagger=False):
+        """
+        Run a sync step for api after delay seconds, or earlier if it is already due sooner.
+        :param stagger: Delay by the phase of api instead, for the first sync after login
+        """
+        if stagger and self._stagger:
+            delay = self._phase(api)
+
+        deadline = time.monotonic() + delay
+        self._due[api] = min(self._due.get(api, deadline), deadline)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_event_loop().create_task(self._run())
+        self._e_wakeup.set()
+
+    def _phase(self, api):
+        """Spread units evenly over the stagger window by their position in the hub."""
+        ids = list(self.units)
+        if api.iam_id not in ids or len(ids) < 2:
+            return 0.0
+        return self._stagger * ids.index(api.iam_id) / len(ids)
+
+    async def _run(self):
+        while True:
+            self._e_wakeup.clear()
+            now = time.monotonic()
+
+            for api in [x for x, deadline in self._due.items() if deadline <= now]:
+                del self._due[api]
+                try:
+                    delay = await api.sync_step()
+                except Exception:  # pylint: disable=broad-except
+                    _LOGGER.exception("Sync step of %s failed", api.iam_id)
+                    delay = None
+
+                self.steps += 1
+                if delay is not None:
+                    deadline = time.monotonic() + delay
+                    self._due[api] = min(self._due.get(api, deadline), deadline)
+                await asyncio.sleep(self._spacing)
+
+            timeout = max(min(self._due.values()) - time.monotonic(), 0) if self._due else None
+            try:
+                await asyncio.wait_for(self._e_wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def close(self):
+        """Stop the scheduler task and close every unit."""
+        await asyncio.gather(*[api.close() for api in self.units.values()])
+        self.units.clear()
+        self._due.clear()
+
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self):
+        """Aggregate connection counters over every unit."""
+        units = list(self.units.values())
+        return {
+            "units": len(units),
+            "connected": sum(1 for x in units if x.connected),
+            "scheduled": len(self._due),
+            "sync_steps": self.steps,
+            "reconnect_attempts": sum(x.reconnect_attempts for x in units),
+            "reconnects": sum(x.reconnects for x in units),
+            "downtime": sum(x.downtime for x in units),
+        }
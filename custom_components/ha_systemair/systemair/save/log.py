@@ -0,0 +1,43 @@
+"""
+Logging helpers for the SaveCair API.
+The library never configures logging itself, handlers and levels are left to the host process.
+"""
+import logging
+import time
+
+
+class RateLimitedLog:
+    """Log a message at most once per interval and key, and report how many repeats were suppressed."""
+
+    def __init__(self, logger, interval=300.0):
+        """
+        :param logger: logging.Logger to emit to
+        :param interval: Seconds during which repeats of a key are suppressed
+        """
+        self._logger = logger
+        self._interval = interval
+        self._last = {}
+        self._suppressed = {}
+
+    def log(self, level, key, msg, *args):
+        if not self._logger.isEnabledFor(level):
+            return
+
+        now = time.monotonic()
+        last = self._last.get(key)
+        if last is not None and now - last < self._interval:
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            return
+
+        self._last[key] = now
+        suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            msg += " (%d similar messages suppressed)"
+            args += (suppressed,)
+        self._logger.log(level, msg, *args)
+
+    def warning(self, key, msg, *args):
+        self.log(logging.WARNING, key, msg, *args)
+
+    def error(self, key, msg, *args):
+        self.log(logging.ERROR, key, msg, *args)
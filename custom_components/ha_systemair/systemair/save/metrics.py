@@ -0,0 +1,79 @@
+"""Counters and histograms describing how a SaveCair connection behaves."""
+from bisect import bisect_left
+from collections import Counter
+
+# Upper bounds in seconds of the latency buckets, the last bucket holds everything slower
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram. Memory does not grow with the number of observations."""
+
+    __slots__ = ("buckets", "counts", "count", "total", "max")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def percentile(self, q):
+        """Return the upper bound of the bucket holding the q-th percentile, None without observations."""
+        if not self.count:
+            return None
+
+        rank = q / 100 * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "max": self.max,
+            "buckets": dict(zip([str(x) for x in self.buckets] + ["inf"], self.counts)),
+        }
+
+
+class Metrics:
+    """Frame counters by type and latency histograms by name."""
+
+    def __init__(self):
+        self.sent = Counter()
+        self.received = Counter()
+        self.histograms = {}
+
+    def observe(self, name, value):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.observe(value)
+
+    def histogram(self, name):
+        """Return the histogram of name, an empty one when nothing was observed yet."""
+        return self.histograms.get(name) or Histogram()
+
+    def as_dict(self):
+        return {
+            "sent": dict(self.sent),
+            "received": dict(self.received),
+            "latency": {name: x.as_dict() for name, x in self.histograms.items()},
+        }
@@ -0,0 +1,36 @@
+"""One-shot credential check against the SaveCair endpoint, without the reconnecting session of SaveAPI."""
+import asyncio
+
+import websockets
+
+from . import codec
+from .api import SAVECAIR_URL, login_error
+from .command import login
+from .const import RECV_TYPE_ERROR, RECV_TYPE_LOGGED_IN
+
+
+async def probe_login(iam_id, password, url=SAVECAIR_URL, timeout=30):
+    """
+    Open one connection, send LOGIN, wait for the answer and close the connection again.
+    :return: The machineID the credentials are valid for
+    :raises ConnectionError: When the endpoint cannot be reached or closes the connection
+    :raises asyncio.TimeoutError: When there is no answer within timeout seconds
+    :raises InvalidPasswordError, InvalidIAMError, InvalidDeviceError, UnknownError: When LOGIN is refused
+    """
+    try:
+        return await asyncio.wait_for(_probe(iam_id, password, url), timeout)
+    except asyncio.TimeoutError:
+        raise
+    except (OSError, websockets.WebSocketException) as e:
+        raise ConnectionError("Could not reach the savecair endpoint: %s" % e) from e
+
+
+async def _probe(iam_id, password, url):
+    async with websockets.connect(url) as ws:
+        await ws.send(login(iam_id, password))
+        while True:
+            frame = codec.loads(await ws.recv())
+            if frame.get("type") == RECV_TYPE_LOGGED_IN:
+                return frame.get("loggedinToMachineId")
+            if frame.get("type") == RECV_TYPE_ERROR:
+                raise login_error(frame.get("errorTypeId"))
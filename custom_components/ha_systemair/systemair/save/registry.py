@@ -0,0 +1,180 @@
+"""Declarative registry of every sensor known to the SaveCair API, built once at import."""
+from collections import namedtuple
+
+from .const import (
+    POLL_TIERS,
+    POSTPROCESS_ALARM,
+    POSTPROCESS_DAYS_UNTIL,
+    POSTPROCESS_FAN_MODE,
+    POSTPROCESS_OPERATION,
+    POSTPROCESS_TEMPERATURE,
+    SA_OPERATION_MODE_AUTO,
+    SA_OPERATION_MODE_CROWDED,
+    SA_OPERATION_MODE_FIREPLACE,
+    SA_OPERATION_MODE_HOLIDAY,
+    SA_OPERATION_MODE_IDLE,
+    SA_OPERATION_MODE_MANUAL,
+    SA_OPERATION_MODE_REFRESH,
+    SENSOR_AUTO_EXTRACT,
+    SENSOR_AUTO_SUPPLY,
+    SENSOR_AWAY_EXTRACT,
+    SENSOR_AWAY_SUPPLY,
+    SENSOR_CROWDED_EXTRACT,
+    SENSOR_CROWDED_SUPPLY,
+    SENSOR_CURRENT_FAN_MODE,
+    SENSOR_CURRENT_HUMIDITY,
+    SENSOR_CURRENT_OPERATION,
+    SENSOR_CUSTOM_FAN_MODE,
+    SENSOR_CUSTOM_OPERATION,
+    SENSOR_FAN_SPEED_SUPPLY,
+    SENSOR_FILTER_TIME,
+    SENSOR_FIREPLACE_EXTRACT,
+    SENSOR_FIREPLACE_SUPPLY,
+    SENSOR_HEAT_RECOVERY_EFFICIENCY,
+    SENSOR_HEAT_RECOVERY_ENERGY,
+    SENSOR_HEAT_RECOVERY_POWER,
+    SENSOR_HOLIDAY_EXTRACT,
+    SENSOR_HOLIDAY_SUPPLY,
+    SENSOR_MODE_CHANGE_REQUEST,
+    SENSOR_REFRESH_EXTRACT,
+    SENSOR_REFRESH_SUPPLY,
+    SENSOR_TARGET_TEMPERATURE,
+    SENSOR_TEMPERATURE_EXTRACT,
+    SENSOR_TEMPERATURE_OUTDOOR,
+    SENSOR_TEMPERATURE_SUPPLY,
+    SENSOR_USER_LOCK,
+    SENSORS_ALARM,
+    SENSORS_FAN_SPEED,
+    SENSORS_FUNCTION,
+)
+
+GROUP_TEMPERATURE = "temperature"
+GROUP_HUMIDITY = "humidity"
+GROUP_FAN_SPEED = "fan_speed"
+GROUP_FILTER = "filter"
+GROUP_MODE = "mode"
+GROUP_USER_MODE = "user_mode"
+GROUP_FUNCTION = "function"
+GROUP_ALARM = "alarm"
+GROUP_CUSTOM = "custom"
+GROUP_DERIVED = "derived"
+
+UNIT_CELSIUS = "°C"
+UNIT_PERCENT = "%"
+UNIT_RPM = "rpm"
+UNIT_DAYS = "d"
+UNIT_WATT = "W"
+UNIT_KWH = "kWh"
+
+Sensor = namedtuple(
+    "Sensor",
+    ["id", "group", "unit", "decoder", "writable", "device", "mode", "period", "climate", "climate_set"],
+    defaults=[None, None, False, True, None, None, None, None],
+)
+Sensor.__doc__ = """
+A sensor of the ventilation unit.
+:param id: Key used on the wire
+:param group: One of the GROUP_* constants
+:param unit: Unit of the decoded value
+:param decoder: Converts the raw wire value, None when the raw value is used as is
+:param writable: Whether the value can be changed through SaveAPI
+:param device: False for keys computed locally, which are never sent to the device
+:param mode: Operation mode whose supply airflow the sensor holds
+:param period: Poll period in seconds, None to use the poll interval of SaveAPI
+:param climate: Climate entity attribute showing the value, named as in Home Assistant
+:param climate_set: Climate entity attribute whose new values are written to the sensor
+"""
+
+_SENSORS = [
+    Sensor(SENSOR_TEMPERATURE_OUTDOOR, GROUP_TEMPERATURE, UNIT_CELSIUS, POSTPROCESS_TEMPERATURE),
+    Sensor(SENSOR_TEMPERATURE_SUPPLY, GROUP_TEMPERATURE, UNIT_CELSIUS, POSTPROCESS_TEMPERATURE),
+    Sensor(SENSOR_TEMPERATURE_EXTRACT, GROUP_TEMPERATURE, UNIT_CELSIUS, POSTPROCESS_TEMPERATURE,
+           climate="temperature"),
+    Sensor(SENSOR_TARGET_TEMPERATURE, GROUP_TEMPERATURE, UNIT_CELSIUS, POSTPROCESS_TEMPERATURE, writable=True,
+           climate="target_temperature", climate_set="temperature"),
+    Sensor(SENSOR_CURRENT_HUMIDITY, GROUP_HUMIDITY, UNIT_PERCENT, climate="current_humidity"),
+    Sensor(SENSOR_FILTER_TIME, GROUP_FILTER, UNIT_DAYS, POSTPROCESS_DAYS_UNTIL),
+    Sensor(SENSOR_CURRENT_FAN_MODE, GROUP_MODE, None, POSTPROCESS_FAN_MODE, writable=True,
+           mode=SA_OPERATION_MODE_MANUAL, climate_set="fan_mode"),
+    Sensor(SENSOR_CURRENT_OPERATION, GROUP_MODE, None, POSTPROCESS_OPERATION, climate="preset_mode"),
+    Sensor(SENSOR_MODE_CHANGE_REQUEST, GROUP_MODE, writable=True, climate_set="preset_mode"),
+    Sensor(SENSOR_USER_LOCK, GROUP_MODE),
+    Sensor(SENSOR_CROWDED_SUPPLY, GROUP_USER_MODE, None, POSTPROCESS_FAN_MODE, mode=SA_OPERATION_MODE_CROWDED),
+    Sensor(SENSOR_REFRESH_SUPPLY, GROUP_USER_MODE, None, POSTPROCESS_FAN_MODE, mode=SA_OPERATION_MODE_REFRESH),
+    Sensor(SENSOR_AWAY_SUPPLY, GROUP_USER_MODE, None, POSTPROCESS_FAN_MODE, mode=SA_OPERATION_MODE_IDLE),
+    Sensor(SENSOR_HOLIDAY_SUPPLY, GROUP_USER_MODE, None, POSTPROCESS_FAN_MODE, mode=SA_OPERATION_MODE_HOLIDAY),
+    Sensor(SENSOR_FIREPLACE_SUPPLY, GROUP_USER_MODE, None, POSTPROCESS_FAN_MODE, mode=SA_OPERATION_MODE_FIREPLACE),
+    Sensor(SENSOR_AUTO_SUPPLY, GROUP_USER_MODE, None, POSTPROCESS_FAN_MODE, mode=SA_OPERATION_MODE_AUTO),
+    Sensor(SENSOR_CROWDED_EXTRACT, GROUP_USER_MODE),
+    Sensor(SENSOR_REFRESH_EXTRACT, GROUP_USER_MODE),
+    Sensor(SENSOR_AWAY_EXTRACT, GROUP_USER_MODE),
+    Sensor(SENSOR_HOLIDAY_EXTRACT, GROUP_USER_MODE),
+    Sensor(SENSOR_FIREPLACE_EXTRACT, GROUP_USER_MODE),
+    Sensor(SENSOR_AUTO_EXTRACT, GROUP_USER_MODE),
+    Sensor(SENSOR_CUSTOM_OPERATION, GROUP_CUSTOM, writable=True, device=False,
+           climate="hvac_mode", climate_set="hvac_mode"),
+    Sensor(SENSOR_CUSTOM_FAN_MODE, GROUP_CUSTOM, device=False, climate="fan_mode"),
+    Sensor(SENSOR_HEAT_RECOVERY_EFFICIENCY, GROUP_DERIVED, UNIT_PERCENT, device=False),
+    Sensor(SENSOR_HEAT_RECOVERY_POWER, GROUP_DERIVED, UNIT_WATT, device=False),
+    Sensor(SENSOR_HEAT_RECOVERY_ENERGY, GROUP_DERIVED, UNIT_KWH, device=False),
+]
+_SENSORS += [Sensor(x, GROUP_FAN_SPEED, UNIT_RPM) for x in SENSORS_FAN_SPEED]
+_SENSORS += [Sensor(x, GROUP_FUNCTION) for x in SENSORS_FUNCTION]
+_SENSORS += [Sensor(x, GROUP_ALARM, None, POSTPROCESS_ALARM) for x in SENSORS_ALARM]
+
+_TIERS = {sensor: period for period, sensors in POLL_TIERS.items() for sensor in sensors}
+_SENSORS = [x._replace(period=_TIERS.get(x.id)) for x in _SENSORS]
+
+SENSORS = {x.id: x for x in _SENSORS}
+
+# Keys the device knows, i.e. everything that may go into a READ frame
+DEVICE_SENSORS = frozenset(x.id for x in _SENSORS if x.device)
+
+# Sensor -> function decoding its raw wire value
+POSTPROCESS_MAP = {x.id: x.decoder for x in _SENSORS if x.decoder is not None}
+
+# Sensor -> poll period in seconds, for sensors with a poll tier
+POLL_PERIODS = {x.id: x.period for x in _SENSORS if x.period is not None}
+
+# Operation mode -> sensor holding the supply airflow used in that mode
+AIRFLOW_BY_OPERATION = {x.mode: x.id for x in _SENSORS if x.mode is not None}
+
+WRITABLE_SENSORS = frozenset(x.id for x in _SENSORS if x.writable)
+
+# Climate entity attribute -> sensor showing it
+CLIMATE_ATTRIBUTES = {x.climate: x.id for x in _SENSORS if x.climate is not None}
+
+# Climate entity attribute -> sensor written when the attribute is set, writable sensors only
+CLIMATE_SETTERS = {x.climate_set: x.id for x in _SENSORS if x.climate_set is not None and x.writable}
+
+HEAT_RECOVERY_INPUTS = (
+    SENSOR_TEMPERATURE_OUTDOOR,
+    SENSOR_TEMPERATURE_SUPPLY,
+    SENSOR_TEMPERATURE_EXTRACT,
+    SENSOR_FAN_SPEED_SUPPLY,
+)
+
+# Locally computed sensor -> device sensors it is computed from
+DEPENDENCIES = {
+    SENSOR_CUSTOM_OPERATION: (SENSOR_CURRENT_OPERATION,),
+    SENSOR_CUSTOM_FAN_MODE: (SENSOR_CURRENT_OPERATION,) + tuple(AIRFLOW_BY_OPERATION.values()),
+    SENSOR_HEAT_RECOVERY_EFFICIENCY: HEAT_RECOVERY_INPUTS,
+    SENSOR_HEAT_RECOVERY_POWER: HEAT_RECOVERY_INPUTS,
+    SENSOR_HEAT_RECOVERY_ENERGY: HEAT_RECOVERY_INPUTS,
+}
+
+
+def sensors_in(group):
+    """Return the ids of every sensor in a group."""
+    return [x.id for x in _SENSORS if x.group == group]
+
+
+def device_sensors_for(keys):
+    """Return the device sensors that have to be read to know keys, resolving locally computed ones."""
+    sensors = set()
+    for key in keys:
+        if key in DEPENDENCIES:
+            sensors.update(DEPENDENCIES[key])
+        elif key in DEVICE_SENSORS:
+            sensors.add(key)
+    return sensors
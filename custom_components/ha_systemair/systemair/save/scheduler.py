@@ -0,0 +1,57 @@
+"""Per-sensor poll scheduling for the SaveCair API."""
+
+
+class PollScheduler:
+    """Track when each sensor is next due and batch everything due in the same tick."""
+
+    def __init__(self, default_period, periods=None, slack=1.0):
+        """
+        :param default_period: Period in seconds for sensors without an explicit period
+        :param periods: dict of sensor -> period in seconds
+        :param slack: Sensors due within this many seconds are read together with the current tick
+        """
+        self._default_period = default_period
+        self._periods = dict(periods or {})
+        self._slack = slack
+        self._due = {}
+
+    @classmethod
+    def from_tiers(cls, default_period, tiers, **kwargs):
+        """Build a scheduler from a dict of period -> iterable of sensors."""
+        periods = {
+            sensor: period
+            for period, sensors in tiers.items()
+            for sensor in sensors
+        }
+        return cls(default_period, periods, **kwargs)
+
+    def period(self, sensor):
+        return self._periods.get(sensor, self._default_period)
+
+    def set_period(self, sensor, period):
+        self._periods[sensor] = period
+        self._due.pop(sensor, None)
+
+    def reset(self):
+        """Mark every sensor as due, e.g. after a reconnect."""
+        self._due.clear()
+
+    def forget(self, sensors):
+        """Mark sensors as due, e.g. when they are subscribed again."""
+        for sensor in sensors:
+            self._due.pop(sensor, None)
+
+    def pop_due(self, sensors, now):
+        """Return the sensors that should be read at time now and schedule their next read."""
+        horizon = now + self._slack
+        due = [x for x in sensors if self._due.get(x, now) <= horizon]
+        for sensor in due:
+            self._due[sensor] = now + self.period(sensor)
+        return due
+
+    def next_due(self, sensors, now):
+        """Return the number of seconds until the next sensor is due, or None when there is nothing to read."""
+        deadlines = [self._due.get(x, now) for x in sensors]
+        if not deadlines:
+            return None
+        return max(min(deadlines) - now, 0)
@@ -0,0 +1,271 @@
+"""
+Local Savecair server speaking the LOGIN / READ / WRITE / VALUE_CHANGED / ERROR protocol.
+Used for offline testing and benchmarks of SaveAPI.
+
+    python -m systemair.save.simulator --port 8765 --push-interval 5 --latency 0.05
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+
+import websockets
+
+from .const import (
+    RECV_TYPE_ERROR,
+    RECV_TYPE_LOGGED_IN,
+    RECV_TYPE_READ,
+    RECV_TYPE_VALUE_CHANGED,
+    REQUEST_LOGIN,
+    REQUEST_READ,
+    REQUEST_WRITE,
+    SENSOR_CURRENT_FAN_MODE,
+    SENSOR_CURRENT_HUMIDITY,
+    SENSOR_CURRENT_OPERATION,
+    SENSOR_FAN_SPEED_EXTRACT,
+    SENSOR_FAN_SPEED_SUPPLY,
+    SENSOR_FILTER_TIME,
+    SENSOR_MODE_CHANGE_REQUEST,
+    SENSOR_TARGET_TEMPERATURE,
+    SENSOR_TEMPERATURE_EXTRACT,
+    SENSOR_TEMPERATURE_OUTDOOR,
+    SENSOR_TEMPERATURE_SUPPLY,
+    SENSOR_USER_LOCK,
+    SENSORS_ALARM,
+    SENSORS_FUNCTION,
+    SENSORS_USER_MODE,
+    WRITE_CONFIRM_MAP,
+)
+from .registry import DEVICE_SENSORS
+
+_LOGGER = logging.getLogger(__name__)
+
+ERROR_WRONG_PASSWORD = "WRONG_PASSWORD"
+ERROR_ACCESS_DENIED_SEVERE = "ACCESS_DENIED_SEVERE"
+ERROR_UNIT_NOT_CONNECTED = "UNIT_NOT_CONNECTED"
+
+# Values that drift when pushes are simulated, with their (min, max) raw range
+DRIFTING_SENSORS = {
+    SENSOR_TEMPERATURE_OUTDOOR: (-250, 350),
+    SENSOR_TEMPERATURE_SUPPLY: (120, 250),
+    SENSOR_TEMPERATURE_EXTRACT: (180, 260),
+    SENSOR_CURRENT_HUMIDITY: (15, 90),
+    SENSOR_FAN_SPEED_EXTRACT: (0, 3000),
+    SENSOR_FAN_SPEED_SUPPLY: (0, 3000),
+}
+
+
+def default_state():
+    """Return the raw state of an idle unit in auto mode for every device sensor in the registry."""
+    state = dict.fromkeys(DEVICE_SENSORS)
+    state.update({
+        SENSOR_TEMPERATURE_OUTDOOR: 52,
+        SENSOR_TEMPERATURE_SUPPLY: 181,
+        SENSOR_TEMPERATURE_EXTRACT: 214,
+        SENSOR_CURRENT_HUMIDITY: 38,
+        SENSOR_FAN_SPEED_EXTRACT: 1480,
+        SENSOR_FAN_SPEED_SUPPLY: 1430,
+        SENSOR_FILTER_TIME: 60 * 24 * 3600,
+        SENSOR_CURRENT_FAN_MODE: "3",
+        SENSOR_CURRENT_OPERATION: "0",
+        SENSOR_MODE_CHANGE_REQUEST: "0",
+        SENSOR_TARGET_TEMPERATURE: 210,
+        SENSOR_USER_LOCK: False,
+    })
+    state.update({x: "3" for x in SENSORS_USER_MODE})
+    state.update({x: False for x in SENSORS_FUNCTION})
+    state.update({x: "inactive" for x in SENSORS_ALARM})
+    return state
+
+
+class SavecairSimulator:
+    """Simulated Savecair endpoint holding the state of a single unit."""
+
+    def __init__(self, iam_id="IAM_SIMULATED", password="1234", host="127.0.0.1", port=0,
+                 latency=0.0, push_interval=None, disconnect_interval=None, login_error=None, seed=None):
+        """
+        :param latency: Seconds to wait before each response, or a (min, max) tuple
+        :param push_interval: Seconds between simulated VALUE_CHANGED pushes, None to disable
+        :param disconnect_interval: Seconds between forced disconnects of every client, None to disable
+        :param login_error: errorTypeId to answer every LOGIN with, e.g. UNIT_NOT_CONNECTED
+        """
+        self.iam_id = iam_id
+        self.password = password
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.push_interval = push_interval
+        self.disconnect_interval = disconnect_interval
+        self.login_error = login_error
+
+        self.state = default_state()
+        self.received = {REQUEST_LOGIN: 0, REQUEST_READ: 0, REQUEST_WRITE: 0}
+        self.sent = {RECV_TYPE_LOGGED_IN: 0, RECV_TYPE_READ: 0, RECV_TYPE_VALUE_CHANGED: 0, RECV_TYPE_ERROR: 0}
+
+        self._random = random.Random(seed)
+        self._errors = []
+        self._clients = set()
+        self._authenticated = set()
+        self._server = None
+        self._tasks = []
+
+    @property
+    def url(self):
+        return "ws://%s:%d/ws/" % (self.host, self.port)
+
+    async def start(self):
+        self._server = await websockets.serve(self._handler, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+        if self.push_interval:
+            self._tasks.append(asyncio.get_event_loop().create_task(self._push_loop()))
+        if self.disconnect_interval:
+            self._tasks.append(asyncio.get_event_loop().create_task(self._disconnect_loop()))
+
+        _LOGGER.info("Savecair simulator listening on %s", self.url)
+        return self
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    def fail_next(self, error_type):
+        """Answer the next request from any client with an ERROR frame of error_type."""
+        self._errors.append(error_type)
+
+    async def disconnect_all(self, code=1011, reason="simulated disconnect"):
+        """Drop every connected client."""
+        await asyncio.gather(*[ws.close(code, reason) for ws in list(self._clients)])
+
+    async def set_values(self, **values):
+        """Change raw values on the unit and push VALUE_CHANGED for the ones that moved."""
+        changed = {k: v for k, v in values.items() if self.state.get(k) != v}
+        self.state.update(changed)
+        if changed:
+            await self._broadcast({"type": RECV_TYPE_VALUE_CHANGED, "changedValues": changed})
+
+    async def _send(self, ws, frame):
+        if self.latency:
+            delay = self._random.uniform(*self.latency) if isinstance(self.latency, tuple) else self.latency
+            await asyncio.sleep(delay)
+
+        self.sent[frame["type"]] += 1
+        try:
+            await ws.send(json.dumps(frame))
+        except websockets.ConnectionClosed:
+            pass
+
+    async def _broadcast(self, frame):
+        await asyncio.gather(*[self._send(ws, frame) for ws in list(self._authenticated)])
+
+    async def _handler(self, ws, path=None):
+        self._clients.add(ws)
+        try:
+            async for raw in ws:
+                await self._on_frame(ws, json.loads(raw))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._clients.discard(ws)
+            self._authenticated.discard(ws)
+
+    async def _on_frame(self, ws, frame):
+        kind = frame.get("type")
+        self.received[kind] = self.received.get(kind, 0) + 1
+
+        if self._errors:
+            await self._send(ws, {"type": RECV_TYPE_ERROR, "errorTypeId": self._errors.pop(0)})
+            return
+
+        if kind == REQUEST_LOGIN:
+            await self._login(ws, frame)
+        elif kind == REQUEST_READ:
+            values = {k: self.state[k] for k in frame.get("idsToRead", []) if k in self.state}
+            await self._send(ws, {"type": RECV_TYPE_READ, "readValues": values})
+        elif kind == REQUEST_WRITE:
+            values = {WRITE_CONFIRM_MAP.get(k, k): v for k, v in frame.get("valuesToWrite", {}).items()}
+            await self.set_values(**values)
+        else:
+            _LOGGER.warning("Simulator received unknown frame: %s", frame)
+
+    async def _login(self, ws, frame):
+        if self.login_error:
+            error = self.login_error
+        elif frame.get("machineId") != self.iam_id:
+            error = ERROR_ACCESS_DENIED_SEVERE
+        elif frame.get("passCode") != self.password:
+            error = ERROR_WRONG_PASSWORD
+        else:
+            self._authenticated.add(ws)
+            await self._send(ws, {"type": RECV_TYPE_LOGGED_IN, "loggedinToMachineId": self.iam_id})
+            return
+
+        await self._send(ws, {"type": RECV_TYPE_ERROR, "errorTypeId": error})
+
+    async def _push_loop(self):
+        while True:
+            await asyncio.sleep(self.push_interval)
+            key = self._random.choice(list(DRIFTING_SENSORS))
+            low, high = DRIFTING_SENSORS[key]
+            value = min(max(self.state[key] + self._random.randint(-5, 5), low), high)
+            await self.set_values(**{key: value})
+
+    async def _disconnect_loop(self):
+        while True:
+            await asyncio.sleep(self.disconnect_interval)
+            _LOGGER.info("Disconnecting %d clients", len(self._clients))
+            await self.disconnect_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Savecair protocol simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--iam-id", default="IAM_SIMULATED")
+    parser.add_argument("--password", default="1234")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--push-interval", type=float, default=None)
+    parser.add_argument("--disconnect-interval", type=float, default=None)
+    parser.add_argument("--login-error", choices=[
+        ERROR_WRONG_PASSWORD, ERROR_ACCESS_DENIED_SEVERE, ERROR_UNIT_NOT_CONNECTED
+    ], default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    simulator = SavecairSimulator(
+        iam_id=args.iam_id,
+        password=args.password,
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        push_interval=args.push_interval,
+        disconnect_interval=args.disconnect_interval,
+        login_error=args.login_error,
+    )
+
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(simulator.start())
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(simulator.stop())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Fixed-schema state store for the sensor values of one unit."""
+import time
+from array import array
+from collections.abc import Mapping
+
+from .registry import SENSORS
+
+# Sensor -> slot, shared by every store
+SCHEMA = {sensor: i for i, sensor in enumerate(SENSORS)}
+
+_UNSET = object()
+
+
+class StateSnapshot(Mapping):
+    """Read-only view of a SensorState at one version. Shares storage with the store until the store changes."""
+
+    __slots__ = ("_values", "version")
+
+    def __init__(self, values, version):
+        self._values = values
+        self.version = version
+
+    def __getitem__(self, key):
+        value = self._values[SCHEMA[key]]
+        if value is _UNSET:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        i = SCHEMA.get(key)
+        return i is not None and self._values[i] is not _UNSET
+
+    def __iter__(self):
+        values = self._values
+        return (sensor for sensor, i in SCHEMA.items() if values[i] is not _UNSET)
+
+    def __len__(self):
+        return sum(1 for x in self._values if x is not _UNSET)
+
+
+class SensorState(StateSnapshot):
+    """
+    Values of every sensor in the registry, stored by slot instead of in a dict.
+    Each slot keeps the time it was last received and the version it last changed in, so callers can ask
+    for the values that changed since a version they have seen. Snapshots are copy-on-write.
+    """
+
+    __slots__ = ("_stamps", "_versions", "_shared")
+
+    def __init__(self):
+        super().__init__([_UNSET] * len(SCHEMA), 0)
+        self._stamps = array("d", [0.0]) * len(SCHEMA)
+        self._versions = array("L", [0]) * len(SCHEMA)
+        self._shared = False
+
+    def set(self, key, value, now=None):
+        """
+        Store a received value.
+        :return: True when the value changed
+        :raises KeyError: When key is not a sensor of the registry
+        """
+        i = SCHEMA[key]
+        self._stamps[i] = time.monotonic() if now is None else now
+
+        old = self._values[i]
+        if old is not _UNSET and old == value:
+            return False
+
+        if self._shared:
+            self._values = list(self._values)
+            self._shared = False
+        self._values[i] = value
+        self.version += 1
+        self._versions[i] = self.version
+        return True
+
+    __setitem__ = set
+
+    def timestamp(self, key):
+        """Monotonic time the value of key was last received, None if it never was."""
+        i = SCHEMA[key]
+        return self._stamps[i] if self._values[i] is not _UNSET else None
+
+    def snapshot(self):
+        """Return a read-only view of the current values without copying them."""
+        self._shared = True
+        return StateSnapshot(self._values, self.version)
+
+    def changed_since(self, version):
+        """Return the sensors whose value changed after version, with their current value."""
+        values, versions = self._values, self._versions
+        return {sensor: values[i] for sensor, i in SCHEMA.items() if versions[i] > version}
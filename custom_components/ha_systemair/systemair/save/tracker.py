@@ -0,0 +1,123 @@
+"""Request/response correlation for the SaveCair websocket."""
+import asyncio
+import time
+
+from .const import (
+    RECV_TYPE_ERROR,
+    RECV_TYPE_LOGGED_IN,
+    RECV_TYPE_READ,
+    RECV_TYPE_VALUE_CHANGED,
+    REQUEST_LOGIN,
+    REQUEST_READ,
+    REQUEST_WRITE,
+)
+from .exceptions import ResponseError
+
+
+def _retrieve(future):
+    """Mark the outcome as retrieved so unawaited confirmations do not log 'exception was never retrieved'."""
+    if not future.cancelled():
+        future.exception()
+
+
+class PendingRequest:
+    """A request waiting for its response."""
+
+    __slots__ = ("kind", "keys", "future", "sent", "_timer")
+
+    def __init__(self, kind, keys, future):
+        self.kind = kind
+        self.keys = set(keys)
+        self.future = future
+        self.sent = time.monotonic()
+        self._timer = None
+
+
+class RequestTracker:
+    """
+    Match incoming frames to the requests that caused them.
+    LOGIN resolves on LOGGED_IN, READ on the first READ frame returning any of its keys and WRITE once
+    VALUE_CHANGED frames have confirmed all of its keys.
+    An ERROR frame fails the most recently sent pending request. ERROR frames carry no correlation, and the
+    device answers a request right away, while older requests may stay pending for reasons of their own, like a
+    WRITE waiting for VALUE_CHANGED or a background READ nobody awaits.
+    """
+
+    def __init__(self, metrics=None):
+        """
+        :param metrics: Metrics that receive the round trip of every answered request, as login, read or write
+        """
+        self._pending = []
+        self._metrics = metrics
+
+    def __len__(self):
+        return len(self._pending)
+
+    def expect(self, kind, keys=(), timeout=None):
+        """Register a request and return a future that resolves with its response."""
+        request = PendingRequest(kind, keys, asyncio.get_event_loop().create_future())
+        request.future.add_done_callback(_retrieve)
+        self._pending.append(request)
+
+        if timeout is not None:
+            request._timer = asyncio.get_event_loop().call_later(
+                timeout, self._fail, request, asyncio.TimeoutError("No %s response within %ss" % (kind, timeout))
+            )
+        return request.future
+
+    def discard(self, future):
+        for request in self._pending:
+            if request.future is future:
+                self._fail(request, None)
+                return
+
+    def resolve(self, frame):
+        """Resolve the pending requests answered by a frame."""
+        kind = frame.get("type")
+
+        if kind == RECV_TYPE_ERROR:
+            if self._pending:
+                self._fail(self._pending[-1], ResponseError(frame.get("errorTypeId")))
+        elif kind == RECV_TYPE_LOGGED_IN:
+            for request in self._pending:
+                if request.kind == REQUEST_LOGIN:
+                    self._done(request, frame)
+                    break
+        elif kind == RECV_TYPE_READ:
+            values = frame.get("readValues", {})
+            for request in self._pending:
+                if request.kind == REQUEST_READ and (not request.keys or not request.keys.isdisjoint(values)):
+                    self._done(request, values)
+                    break
+        elif kind == RECV_TYPE_VALUE_CHANGED:
+            values = frame.get("changedValues", {})
+            for request in list(self._pending):
+                if request.kind == REQUEST_WRITE:
+                    request.keys.difference_update(values)
+                    if not request.keys:
+                        self._done(request, values)
+
+    def fail_all(self, exc):
+        for request in list(self._pending):
+            self._fail(request, exc)
+
+    def _remove(self, request):
+        if request._timer is not None:
+            request._timer.cancel()
+        self._pending.remove(request)
+
+    def _done(self, request, result):
+        self._remove(request)
+        if self._metrics is not None:
+            self._metrics.observe(request.kind.lower(), time.monotonic() - request.sent)
+        if not request.future.done():
+            request.future.set_result(result)
+
+    def _fail(self, request, exc):
+        self._remove(request)
+        if request.future.done():
+            return
+        if exc is None:
+            request.future.cancel()
+        else:
+            request.future.set_exception(exc)